@@ -1,11 +1,43 @@
-from flask import Flask, render_template, redirect, url_for, request, flash, jsonify
+from flask import Flask, render_template, redirect, url_for, request, flash, jsonify, Response, send_from_directory, abort, g, has_request_context
+from flask import request_started, request_finished, before_render_template, template_rendered, session
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, login_user, login_required, logout_user, UserMixin, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
-from datetime import datetime
+from werkzeug.security import generate_password_hash, check_password_hash, safe_join
+from werkzeug.middleware.proxy_fix import ProxyFix
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, object_session, make_transient_to_detached
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime, timedelta
+from collections import namedtuple, OrderedDict, Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from contextlib import contextmanager
+import atexit
+import click
+import hashlib
+import json
+import math
+import mimetypes
+import multiprocessing
 import os
-import uuid
+import queue
+import random
+import re
+import select
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+try:
+    import redis
+except ImportError:
+    redis = None
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'supersecretkey'
@@ -23,9 +55,81 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
     "pool_recycle": 300,
     "pool_pre_ping": True,
 }
+if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    # Havuz işçi süreci başınadır: iş parçacığı sayısı kadar bağlantı, arka plan işleri için biraz taşma payı
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'].update({
+        "pool_size": int(os.environ.get('DB_POOL_SIZE', os.environ.get('WEB_THREADS', 8))),
+        "max_overflow": int(os.environ.get('DB_MAX_OVERFLOW', 4)),
+        "pool_timeout": int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    })
+app.config['SQLITE_BUSY_TIMEOUT'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 app.config['ALLOWED_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+app.config['IMAGE_WORKERS'] = int(os.environ.get('IMAGE_WORKERS', 2))
+app.config['IMAGE_VARIANTS'] = {'thumb': 128, 'medium': 1024}
+app.config['UPLOAD_GC_GRACE_HOURS'] = int(os.environ.get('UPLOAD_GC_GRACE_HOURS', 1))
+app.config['STATIC_IMMUTABLE_MAX_AGE'] = 365 * 24 * 60 * 60
+# nginx: internal location öneki (ör. /_uploads/), Apache/lighttpd: USE_X_SENDFILE=1
+app.config['UPLOAD_ACCEL_REDIRECT'] = os.environ.get('UPLOAD_ACCEL_REDIRECT')
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+app.config['POSTS_PER_PAGE'] = int(os.environ.get('POSTS_PER_PAGE', 20))
+app.config['ADMIN_PAGE_SIZE'] = int(os.environ.get('ADMIN_PAGE_SIZE', 50))
+app.config['PURGE_BATCH_SIZE'] = int(os.environ.get('PURGE_BATCH_SIZE', 500))
+app.config['COMMENTS_PER_PAGE'] = int(os.environ.get('COMMENTS_PER_PAGE', 50))
+app.config['TAXONOMY_CHECK_INTERVAL'] = int(os.environ.get('TAXONOMY_CHECK_INTERVAL', 30))
+app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 60))
+app.config['FRAGMENT_CACHE_TTL'] = int(os.environ.get('FRAGMENT_CACHE_TTL', 60))
+app.config['FRAGMENT_CACHE_MAX_ENTRIES'] = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 500))
+app.config['FRAGMENT_CACHE_URL'] = os.environ.get('FRAGMENT_CACHE_URL')
+app.config['FRAGMENT_GENERATION_CHECK_INTERVAL'] = int(os.environ.get('FRAGMENT_GENERATION_CHECK_INTERVAL', 5))
+app.config['LEADERBOARD_PAGE_SIZE'] = int(os.environ.get('LEADERBOARD_PAGE_SIZE', 50))
+app.config['LIKE_BATCH_LIMIT'] = int(os.environ.get('LIKE_BATCH_LIMIT', 50))
+app.config['LIKE_STATE_MAX_USERS'] = int(os.environ.get('LIKE_STATE_MAX_USERS', 1000))
+# PostgreSQL'de LISTEN/NOTIFY: bir işçide yayınlanan bildirim diğer işçilerdeki dinleyicilere de ulaşır
+app.config['NOTIFICATION_BACKEND'] = os.environ.get(
+    'NOTIFICATION_BACKEND', 'postgresql' if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql') else 'local')
+app.config['NOTIFICATION_STREAM_TIMEOUT'] = int(os.environ.get('NOTIFICATION_STREAM_TIMEOUT', 25))
+# Akış ayrı asenkron sunucuda (gunicorn.stream.conf.py) sunuluyorsa sayfalar bu adresi uzun sorguyla bekler;
+# boşsa koşullu /notifications sorgusuna düşülür
+app.config['NOTIFICATION_STREAM_URL'] = os.environ.get('NOTIFICATION_STREAM_URL')
+app.config['NOTIFICATION_RETENTION_DAYS'] = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', 30))
+app.config['LIKE_NOTIFICATION_FLUSH_INTERVAL'] = float(os.environ.get('LIKE_NOTIFICATION_FLUSH_INTERVAL', 2))
+app.config['LIKE_NOTIFICATION_BATCH_SIZE'] = int(os.environ.get('LIKE_NOTIFICATION_BATCH_SIZE', 500))
+app.config['PROFILING_ENABLED'] = os.environ.get('PROFILING_ENABLED', '1') == '1'
+app.config['SLOW_REQUEST_MS'] = int(os.environ.get('SLOW_REQUEST_MS', 1000))
+app.config['SLOW_REQUEST_EXPLAIN_RATE'] = float(os.environ.get('SLOW_REQUEST_EXPLAIN_RATE', 0))
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+# Tam biçimde yazılmalı (ör. pbkdf2:sha256:600000, scrypt:32768:8:1); değişirse şifreler girişte yeniden özetlenir
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+# 0: özet istek iş parçacığında hesaplanır (geliştirme ya da __main__ korumasız betikler için)
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+# İş parçacıklarının en fazla yarısı özet bekleyebilir; giriş yığılması sayfa isteklerini aç bırakmaz
+app.config['PASSWORD_HASH_QUEUE_LIMIT'] = int(os.environ.get(
+    'PASSWORD_HASH_QUEUE_LIMIT', max(1, int(os.environ.get('WEB_THREADS', 8)) // 2)))
+app.config['PASSWORD_HASH_TIMEOUT'] = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+# Uç nokta başına jeton kovaları: capacity isteklik patlama, period saniyede tamamen dolar.
+# key: 'user' (giriş yapmışsa kullanıcı, değilse IP), 'ip' ya da 'username' (formdaki kullanıcı adı + IP).
+# Okuldaki öğrenciler aynı IP'yi paylaşır; bu yüzden yalnızca IP'ye bağlı kovalar bir sınıfı kaldıracak kadar geniştir.
+RateLimit = namedtuple('RateLimit', 'capacity period methods key')
+app.config['RATE_LIMITS'] = {
+    'register': (RateLimit(60, 3600, ('POST',), 'ip'),),
+    'login': (RateLimit(10, 300, ('POST',), 'username'), RateLimit(300, 300, ('POST',), 'ip')),
+    'create_post': (RateLimit(5, 300, ('POST',), 'user'),),
+    'add_comment': (RateLimit(20, 300, ('POST',), 'user'),),
+    'like_item': (RateLimit(60, 60, ('GET',), 'user'),),
+    'like_batch': (RateLimit(20, 60, ('POST',), 'user'),),
+}
+app.config['RATE_LIMIT_ENABLED'] = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+app.config['RATE_LIMIT_URL'] = os.environ.get('RATE_LIMIT_URL')
+app.config['RATE_LIMIT_MAX_KEYS'] = int(os.environ.get('RATE_LIMIT_MAX_KEYS', 100000))
+# Ters vekil (nginx, PaaS yönlendiricisi) arkasında istemci IP'si X-Forwarded-For'dan alınır; değer güvenilen
+# vekil sayısıdır. gunicorn.conf.py bunu 1 yapar; gunicorn doğrudan internete açıksa 0 olmalıdır, yoksa
+# istemciler başlığı taklit ederek hız sınırını aşabilir.
+app.config['PROXY_FIX_X_FOR'] = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+
+if app.config['PROXY_FIX_X_FOR']:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
 
 db = SQLAlchemy(app)
 
@@ -33,31 +137,389 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+# İstek profili: SQL, şablon ve dosya G/Ç süreleri uç nokta başına toplanır. Sayaçlar süreç başınadır,
+# gunicorn'da her işçi kendi /metrics değerlerini verir.
+REQUEST_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SLOW_REQUEST_TOP_QUERIES = 3
+
+def new_endpoint_metrics():
+    return {'requests': 0, 'errors': 0, 'seconds': 0.0, 'buckets': [0] * len(REQUEST_DURATION_BUCKETS),
+            'queries': 0, 'query_seconds': 0.0, 'render_seconds': 0.0, 'upload_io_seconds': 0.0, 'lazy_loads': Counter()}
+
+request_metrics = defaultdict(new_endpoint_metrics)
+metrics_lock = threading.Lock()
+
+def current_profile():
+    return g.get('profile') if has_request_context() else None
+
+@contextmanager
+def profiled(field):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile = current_profile()
+        if profile is not None:
+            profile[field] += time.perf_counter() - started
+
+@request_started.connect_via(app)
+def start_request_profile(sender, **extra):
+    if app.config['PROFILING_ENABLED']:
+        g.profile = {'started': time.perf_counter(), 'queries': 0, 'query_seconds': 0.0, 'render_seconds': 0.0,
+                     'upload_io_seconds': 0.0, 'render_depth': 0, 'lazy_loads': Counter(), 'slowest': []}
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context.profile_started = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile()
+    if profile is None:
+        return
+    elapsed = time.perf_counter() - context.profile_started
+    profile['queries'] += 1
+    profile['query_seconds'] += elapsed
+    slowest = profile['slowest']
+    if len(slowest) < SLOW_REQUEST_TOP_QUERIES or elapsed > slowest[-1][0]:
+        slowest.append((elapsed, statement, None if executemany else parameters))
+        slowest.sort(key=lambda item: item[0], reverse=True)
+        del slowest[SLOW_REQUEST_TOP_QUERIES:]
+
+# Tembel yüklemenin kaynağı: onu tetikleyen şablon satırı ya da app.py satırı
+def lazy_load_origin():
+    frame = sys._getframe(2)
+    while frame is not None:
+        template = frame.f_globals.get('__jinja_template__')
+        if template is not None:
+            return f"{template.name or 'şablon'}:{template.get_corresponding_lineno(frame.f_lineno)}"
+        if frame.f_code.co_filename == __file__:
+            return f'app.py:{frame.f_lineno}'
+        frame = frame.f_back
+    return 'bilinmiyor'
+
+@event.listens_for(Session, 'do_orm_execute')
+def record_lazy_load(orm_execute_state):
+    profile = current_profile()
+    if profile is None or not orm_execute_state.is_select or orm_execute_state.lazy_loaded_from is None:
+        return
+    path = orm_execute_state.loader_strategy_path.path
+    profile['lazy_loads'][f'{lazy_load_origin()} {path[0].class_.__name__}.{path[-1].key}'] += 1
+
+@before_render_template.connect_via(app)
+def start_render_timer(sender, template, context, **extra):
+    profile = current_profile()
+    if profile is not None:
+        if profile['render_depth'] == 0:
+            profile['render_started'] = time.perf_counter()
+        profile['render_depth'] += 1
+
+@template_rendered.connect_via(app)
+def record_render(sender, template, context, **extra):
+    profile = current_profile()
+    if profile is not None and profile['render_depth']:
+        profile['render_depth'] -= 1
+        if profile['render_depth'] == 0:
+            profile['render_seconds'] += time.perf_counter() - profile['render_started']
+
+def explain_query(statement, parameters):
+    prefix = 'EXPLAIN QUERY PLAN ' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    try:
+        with db.engine.connect() as connection:
+            rows = connection.exec_driver_sql(prefix + statement, parameters).all()
+    except Exception:
+        app.logger.exception('Sorgu planı alınamadı')
+        return []
+    return [' '.join(str(value) for value in row) for row in rows]
+
+def log_slow_request(endpoint, elapsed, profile):
+    lines = [f"Yavaş istek {elapsed * 1000:.0f} ms {request.method} {request.full_path} ({endpoint}): "
+             f"{profile['queries']} sorgu {profile['query_seconds'] * 1000:.0f} ms, "
+             f"şablon {profile['render_seconds'] * 1000:.0f} ms, dosya {profile['upload_io_seconds'] * 1000:.0f} ms"]
+    explain = random.random() < app.config['SLOW_REQUEST_EXPLAIN_RATE']
+    for duration, statement, parameters in profile['slowest']:
+        lines.append(f"  {duration * 1000:.1f} ms {' '.join(statement.split())[:500]}")
+        if explain and parameters is not None and statement.lstrip().upper().startswith('SELECT'):
+            lines.extend(f'    {row}' for row in explain_query(statement, parameters))
+    for origin, count in profile['lazy_loads'].most_common(5):
+        lines.append(f'  tembel yükleme {count}x {origin}')
+    app.logger.warning('\n'.join(lines))
+
+@request_finished.connect_via(app)
+def finish_request_profile(sender, response, **extra):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return
+    elapsed = time.perf_counter() - profile['started']
+    endpoint = request.endpoint or 'bulunamadi'
+    with metrics_lock:
+        metrics = request_metrics[endpoint]
+        metrics['requests'] += 1
+        metrics['errors'] += response.status_code >= 500
+        metrics['seconds'] += elapsed
+        for i, bound in enumerate(REQUEST_DURATION_BUCKETS):
+            if elapsed <= bound:
+                metrics['buckets'][i] += 1
+        for field in ('queries', 'query_seconds', 'render_seconds', 'upload_io_seconds'):
+            metrics[field] += profile[field]
+        metrics['lazy_loads'].update(profile['lazy_loads'])
+    
+    if app.config['SLOW_REQUEST_MS'] and elapsed * 1000 >= app.config['SLOW_REQUEST_MS']:
+        log_slow_request(endpoint, elapsed, profile)
+
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
-def get_random_filename(filename):
-    ext = filename.rsplit('.', 1)[1].lower()
-    return f"{uuid.uuid4().hex}.{ext}"
+# Yüklemeler içerik özetine göre (sha256) parçalı dizinlerde tek kopya olarak saklanır
+class LocalBlobStorage:
+    chunk_size = 64 * 1024
+    
+    def __init__(self, root):
+        self.root = root
+    
+    def path(self, key):
+        return os.path.join(self.root, key)
+    
+    def save(self, stream, ext):
+        temp_dir = os.path.join(self.root, '.tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in iter(lambda: stream.read(self.chunk_size), b''):
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            content_hash = digest.hexdigest()
+            key = f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}.{ext}"
+            target = self.path(key)
+            try:
+                # Çöp toplayıcı yeni kullanılan dosyayı silmesin
+                os.utime(target)
+                os.remove(temp_path)
+            except FileNotFoundError:
+                # Dosya hiç yoktu ya da çöp toplayıcı az önce mezar taşına taşıdı
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(temp_path, target)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return key, size
+    
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+    
+    # Çöp toplayıcı dosyayı satırı silmeden önce mezar taşı adına taşır, gerekirse geri getirir
+    def bury(self, key):
+        try:
+            os.replace(self.path(key), self.path(key) + '.gc')
+        except FileNotFoundError:
+            pass
+    
+    def unbury(self, key):
+        try:
+            os.replace(self.path(key) + '.gc', self.path(key))
+        except FileNotFoundError:
+            pass
+    
+    def modified_at(self, key):
+        return datetime.utcfromtimestamp(os.path.getmtime(self.path(key)))
+    
+    def iter_keys(self):
+        for directory, subdirectories, filenames in os.walk(self.root):
+            subdirectories[:] = [d for d in subdirectories if d != '.tmp']
+            relative = os.path.relpath(directory, self.root)
+            if relative == '.':
+                continue
+            for filename in filenames:
+                yield f"{relative.replace(os.sep, '/')}/{filename}"
+
+def upload_storage():
+    return LocalBlobStorage(app.config['UPLOAD_FOLDER'])
+
+def is_blob_key(key):
+    return '/' in key
+
+def variant_key(key, variant):
+    return f"{key.rsplit('.', 1)[0]}_{variant}.webp"
+
+def store_upload(file):
+    if not (file and file.filename != '' and allowed_file(file.filename)):
+        return None
+    with profiled('upload_io_seconds'):
+        key, size = upload_storage().save(file.stream, file.filename.rsplit('.', 1)[1].lower())
+    retain_blob(key, size)
+    return key
+
+def release_upload(key, *legacy_files):
+    release_uploads([(key,) + legacy_files])
+
+# Aynı miktarda değişen anahtarlar tek UPDATE ile güncellenir
+def change_blob_refs(counts, direction):
+    keys_by_count = defaultdict(list)
+    for key, count in counts.items():
+        keys_by_count[count].append(key)
+    for count, keys in keys_by_count.items():
+        Blob.query.filter(Blob.key.in_(keys)).update(
+            {Blob.ref_count: Blob.ref_count + direction * count, Blob.updated_at: datetime.utcnow()}, synchronize_session=False)
+
+# (anahtar, eski kopyalar...) demetlerini toplu bırakır; aynı anahtar birden çok kez gelebilir
+def release_uploads(files):
+    counts = Counter(key for key, *legacy_files in files if key)
+    if not counts:
+        return
+    
+    change_blob_refs(counts, -1)
+    known = set(db.session.execute(db.select(Blob.key).where(Blob.key.in_(counts))).scalars())
+    for key, *legacy_files in files:
+        if key and key not in known and not is_blob_key(key):
+            # İçerik adresli depodan önceki (uuid adlı) dosyalar doğrudan silinir
+            with profiled('upload_io_seconds'):
+                for filename in [key] + legacy_files:
+                    if filename:
+                        upload_storage().delete(filename)
+
+# Küçültülmüş WebP kopyaları arka planda üretilir
+image_state = {}
+image_lock = threading.Lock()
+
+def image_executor():
+    with image_lock:
+        if 'executor' not in image_state:
+            image_state['executor'] = ThreadPoolExecutor(max_workers=app.config['IMAGE_WORKERS'], thread_name_prefix='image')
+        return image_state['executor']
+
+def create_image_variant(filename, variant):
+    size = app.config['IMAGE_VARIANTS'][variant]
+    variant_name = variant_key(filename, variant)
+    target = upload_storage().path(variant_name)
+    if os.path.exists(target):
+        return variant_name
+    with Image.open(upload_storage().path(filename)) as image:
+        if getattr(image, 'is_animated', False):
+            return None
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P', 'PA') else 'RGB')
+        # Yeniden kodlanan kopyaya EXIF/ICC gibi üst veriler taşınmaz
+        # Aynı içerik aynı anda iki kez yüklenebilir; her iş parçacığı kendi geçici dosyasına yazar
+        partial = f'{target}.{threading.get_ident()}.part'
+        image.save(partial, 'WEBP', quality=80, method=4)
+    os.replace(partial, target)
+    return variant_name
+
+def process_image(model, item_id, source, target, filename, variant):
+    try:
+        variant_name = create_image_variant(filename, variant)
+    except Exception:
+        app.logger.exception('Resim işlenemedi: %s', filename)
+        return
+    if variant_name is None:
+        return
+    with app.app_context():
+        updated = model.query.filter(model.id == item_id, getattr(model, source) == filename).update(
+            {getattr(model, target): variant_name}, synchronize_session=False)
+        db.session.commit()
+        if updated and model is User:
+            invalidate_user(item_id)
+    if not updated and not is_blob_key(filename):
+        upload_storage().delete(variant_name)
+
+def schedule_image_variant(model, item_id, source, target, filename, variant):
+    if Image is not None and filename:
+        image_executor().submit(process_image, model, item_id, source, target, filename, variant)
+
+# Statik dosyalar içerik özetiyle sürümlenir, yüklemeler değişmez olarak önbelleğe alınır
+static_state = {}
+
+def static_manifest():
+    if 'manifest' not in static_state:
+        manifest = {}
+        upload_folder = os.path.abspath(app.config['UPLOAD_FOLDER'])
+        for directory, subdirectories, filenames in os.walk(app.static_folder):
+            subdirectories[:] = [d for d in subdirectories if os.path.abspath(os.path.join(directory, d)) != upload_folder]
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                with open(path, 'rb') as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()[:12]
+                manifest[os.path.relpath(path, app.static_folder).replace(os.sep, '/')] = digest
+        static_state['manifest'] = manifest
+    return static_state['manifest']
+
+@app.url_defaults
+def fingerprint_static_url(endpoint, values):
+    if endpoint == 'static' and 'v' not in values:
+        version = static_manifest().get(values.get('filename'))
+        if version:
+            values['v'] = version
+
+def cache_forever(response):
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config['STATIC_IMMUTABLE_MAX_AGE']
+    response.cache_control.immutable = True
+    return response
+
+def send_upload(key):
+    # Dosya adları içerikten (ya da uuid'den) türediği için ad güçlü bir ETag'dir
+    etag = key.rsplit('/', 1)[-1].rsplit('.', 1)[0]
+    accel_prefix = app.config['UPLOAD_ACCEL_REDIRECT']
+    if accel_prefix:
+        path = safe_join(app.config['UPLOAD_FOLDER'], key)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        response = Response(mimetype=mimetypes.guess_type(key)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + key
+        response.set_etag(etag)
+        return cache_forever(response)
+    return cache_forever(send_from_directory(
+        os.path.abspath(app.config['UPLOAD_FOLDER']), key, etag=etag, conditional=True,
+        max_age=app.config['STATIC_IMMUTABLE_MAX_AGE']))
+
+def serve_static(filename):
+    if filename.startswith('uploads/'):
+        return send_upload(filename[len('uploads/'):])
+    version = static_manifest().get(filename)
+    if version and request.args.get('v') == version:
+        return cache_forever(send_from_directory(app.static_folder, filename, etag=version,
+                                                 max_age=app.config['STATIC_IMMUTABLE_MAX_AGE']))
+    return app.send_static_file(filename)
+
+app.view_functions['static'] = serve_static
 
 class User(UserMixin, db.Model):
+    __table_args__ = (
+        db.Index('ix_user_leaderboard', 'is_banned', 'solution_count', 'id'),
+        db.Index('ix_user_class_leaderboard', 'class_level', 'is_banned', 'solution_count', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(150), unique=True, nullable=False)
     password = db.Column(db.String(200), nullable=False)
     profile_picture = db.Column(db.String(200), nullable=True)
+    profile_picture_thumb = db.Column(db.String(200), nullable=True)
     class_level = db.Column(db.String(10), default="5")
     solution_count = db.Column(db.Integer, default=0)
     rank = db.Column(db.String(50), default="Çaylak Üye")
     is_admin = db.Column(db.Boolean, default=False)
     is_banned = db.Column(db.Boolean, default=False)
     ban_reason = db.Column(db.String(200), nullable=True)
-    notifications = db.relationship('Notification', backref='user', lazy=True)
-    posts = db.relationship('Post', backref='author', lazy=True)
-    comments = db.relationship('Comment', backref='author', lazy=True)
-    likes = db.relationship('Like', backref='user', lazy=True)
+    comment_count = db.Column(db.Integer, default=0, server_default='0')
+    like_version = db.Column(db.Integer, default=0, server_default='0')
+    notifications = db.relationship('Notification', backref='user', lazy=True, cascade='all, delete', passive_deletes=True)
+    posts = db.relationship('Post', backref='author', lazy=True, cascade='all, delete', passive_deletes=True)
+    comments = db.relationship('Comment', backref='author', lazy=True, cascade='all, delete', passive_deletes=True)
+    likes = db.relationship('Like', backref='user', lazy=True, cascade='all, delete', passive_deletes=True)
 
 class Category(db.Model):
+    __table_args__ = (
+        db.Index('uq_category_name_level', 'name', 'class_level', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     class_level = db.Column(db.String(10), nullable=False)
@@ -65,53 +527,1196 @@ class Category(db.Model):
     units = db.relationship('Unit', backref='category', lazy=True)
 
 class Unit(db.Model):
+    __table_args__ = (
+        db.Index('uq_unit_category_name', 'category_id', 'name', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'))
     posts = db.relationship('Post', backref='unit', lazy=True)
 
 class Post(db.Model):
+    __table_args__ = (
+        db.Index('ix_post_listing', 'is_pinned', 'date_posted', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
     image = db.Column(db.String(200), nullable=True)
-    date_posted = db.Column(db.DateTime, default=datetime.utcnow)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
-    category_id = db.Column(db.Integer, db.ForeignKey('category.id'))
-    unit_id = db.Column(db.Integer, db.ForeignKey('unit.id'))
+    image_medium = db.Column(db.String(200), nullable=True)
+    date_posted = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), index=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), index=True)
+    unit_id = db.Column(db.Integer, db.ForeignKey('unit.id'), index=True)
     is_solved = db.Column(db.Boolean, default=False)
     is_pinned = db.Column(db.Boolean, default=False)
-    comments = db.relationship('Comment', backref='post', lazy=True)
-    likes = db.relationship('Like', backref='post', lazy=True)
+    like_count = db.Column(db.Integer, default=0, server_default='0')
+    comment_count = db.Column(db.Integer, default=0, server_default='0')
+    comments = db.relationship('Comment', backref='post', lazy=True, cascade='all, delete', passive_deletes=True)
+    likes = db.relationship('Like', backref='post', lazy=True, cascade='all, delete', passive_deletes=True)
 
 class Comment(db.Model):
+    __table_args__ = (
+        db.Index('ix_comment_thread', 'post_id', 'is_solution', 'date_posted', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
     image = db.Column(db.String(200), nullable=True)
+    image_medium = db.Column(db.String(200), nullable=True)
     date_posted = db.Column(db.DateTime, default=datetime.utcnow)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
-    post_id = db.Column(db.Integer, db.ForeignKey('post.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), index=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id', ondelete='CASCADE'), index=True)
     is_solution = db.Column(db.Boolean, default=False)
-    likes = db.relationship('Like', backref='comment', lazy=True)
+    like_count = db.Column(db.Integer, default=0, server_default='0')
+    likes = db.relationship('Like', backref='comment', lazy=True, cascade='all, delete', passive_deletes=True)
 
 class Like(db.Model):
+    __table_args__ = (
+        db.Index('uq_like_user_post', 'user_id', 'post_id', unique=True),
+        db.Index('uq_like_user_comment', 'user_id', 'comment_id', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
-    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=True)
-    comment_id = db.Column(db.Integer, db.ForeignKey('comment.id'), nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'))
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id', ondelete='CASCADE'), nullable=True, index=True)
+    comment_id = db.Column(db.Integer, db.ForeignKey('comment.id', ondelete='CASCADE'), nullable=True, index=True)
     date_liked = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Notification(db.Model):
+    __table_args__ = (
+        db.Index('ix_notification_user_seen_date', 'user_id', 'seen', 'date_created'),
+        db.Index('ix_notification_link', 'link'),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'))
     message = db.Column(db.String(200))
     link = db.Column(db.String(200))
     seen = db.Column(db.Boolean, default=False)
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
 
+class TaxonomyVersion(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class FragmentGeneration(db.Model):
+    tag = db.Column(db.String(100), primary_key=True)
+    generation = db.Column(db.Integer, default=0, nullable=False)
+
+class Blob(db.Model):
+    __table_args__ = (
+        db.Index('ix_blob_gc', 'ref_count', 'updated_at'),
+    )
+    key = db.Column(db.String(200), primary_key=True)
+    size = db.Column(db.Integer, default=0)
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class SchemaMigration(db.Model):
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ContentImport(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    exported_at = db.Column(db.String(40), unique=True, nullable=False)
+    imported_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class PurgeJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    target_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# SQLite yabancı anahtarları (ve ON DELETE CASCADE) yalnızca bağlantı başına açılınca uygular;
+# WAL okurların yazarı beklemesini önler, busy_timeout kilitte hemen hata vermek yerine bekletir
+@event.listens_for(Engine, 'connect')
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.execute(f"PRAGMA busy_timeout={app.config['SQLITE_BUSY_TIMEOUT']}")
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
+
+# Oturumdaki kullanıcının satırı süreç içinde tutulur ve her istekte sorgusuz olarak oturuma bağlanır;
+# kayıt profil etiketinin nesliyle saklanır, başka bir işçideki ban ya da sayaç değişikliği onu bayatlatır
+user_cache = {}
+
+def invalidate_user(user_id):
+    user_cache.pop(user_id, None)
+    fragment_cache.invalidate(f'profile:{user_id}')
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    generation = fragment_cache.generation(f'profile:{user_id}')
+    cached = user_cache.get(user_id)
+    if cached and cached[1] == generation and time.monotonic() - cached[0] < app.config['USER_CACHE_TTL']:
+        user = User(**cached[2])
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+    
+    user = db.session.get(User, user_id)
+    if user is not None:
+        user_cache[user_id] = (time.monotonic(), generation, {attr.key: getattr(user, attr.key) for attr in db.inspect(User).column_attrs})
+    return user
+
+# JSON döndüren uç noktalar; reddedilen istekler yönlendirme yerine JSON hata alır
+JSON_ENDPOINTS = {'like_item', 'like_batch', 'get_notifications', 'notification_stream', 'get_units'}
+
+# Hız sınırı kovaları. Süreç içi depo kilitsizdir: kova (jeton, zaman) demeti olarak tek atamayla yazılır,
+# yarışta en fazla birkaç fazla istek geçebilir. Birden çok işçi için RATE_LIMIT_URL ile Redis kullanılır.
+class LocalRateLimitStore:
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self.buckets = {}
+        self.sweep_lock = threading.Lock()
+    
+    def take(self, key, capacity, period):
+        rate = capacity / period
+        now = time.monotonic()
+        tokens, updated_at = self.buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self.buckets[key] = (tokens, now)
+        if len(self.buckets) > self.max_keys:
+            self.sweep(now, period)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+    
+    def sweep(self, now, period):
+        # Süpürmeyi tek iş parçacığı yapar, diğerleri beklemeden devam eder
+        if not self.sweep_lock.acquire(blocking=False):
+            return
+        try:
+            for key, (tokens, updated_at) in self.buckets.copy().items():
+                if now - updated_at >= period:
+                    self.buckets.pop(key, None)
+        finally:
+            self.sweep_lock.release()
+
+class RedisRateLimitStore:
+    script = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate))
+    return {allowed, tostring(tokens)}
+    """
+    
+    def __init__(self, url, fallback):
+        self.client = redis.Redis.from_url(url)
+        self.take_script = self.client.register_script(self.script)
+        self.fallback = fallback
+    
+    def take(self, key, capacity, period):
+        rate = capacity / period
+        try:
+            allowed, tokens = self.take_script(keys=[f'ratelimit:{key}'], args=[capacity, rate, time.time()])
+        except redis.RedisError:
+            app.logger.exception('Ortak hız sınırı deposuna ulaşılamadı')
+            return self.fallback.take(key, capacity, period)
+        tokens = float(tokens)
+        return bool(allowed), 0 if allowed else (1 - tokens) / rate
+
+def create_rate_limit_store(url):
+    local_store = LocalRateLimitStore(app.config['RATE_LIMIT_MAX_KEYS'])
+    if not url:
+        return local_store
+    if redis is None:
+        app.logger.warning('redis paketi kurulu değil, hız sınırı süreç içinde tutulacak')
+        return local_store
+    return RedisRateLimitStore(url, local_store)
+
+rate_limit_store = create_rate_limit_store(app.config['RATE_LIMIT_URL'])
+rate_limit_rejections = Counter()
+
+def rate_limit_key(limit):
+    if limit.key == 'username':
+        return f"n{request.form.get('username', '').strip().lower()}|{request.remote_addr}"
+    user_id = session.get('_user_id') if limit.key == 'user' else None
+    return f'u{user_id}' if user_id else f'ip{request.remote_addr}'
+
+# Veritabanına ya da şifre doğrulamasına inmeden önce çalışır: kullanıcı kimliği oturum çerezinden okunur
+@app.before_request
+def rate_limit_gate():
+    limits = app.config['RATE_LIMITS'].get(request.endpoint, ())
+    if not app.config['RATE_LIMIT_ENABLED']:
+        return None
+    retry_after = 0
+    for limit in limits:
+        if request.method in limit.methods:
+            allowed, wait = rate_limit_store.take(f'{request.endpoint}:{limit.key}:{rate_limit_key(limit)}',
+                                                  limit.capacity, limit.period)
+            if not allowed:
+                retry_after = max(retry_after, wait)
+    if not retry_after:
+        return None
+    
+    with metrics_lock:
+        rate_limit_rejections[request.endpoint] += 1
+    if request.endpoint in JSON_ENDPOINTS:
+        response = jsonify({'success': False, 'message': 'Çok fazla istek! Lütfen biraz bekleyin.'})
+        response.status_code = 429
+    else:
+        flash('Çok fazla istek gönderdiniz! Lütfen biraz bekleyip tekrar deneyin.', 'warning')
+        response = redirect(request.referrer or url_for('forum'))
+    response.headers['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+# Banlı kullanıcılar her istekte tek noktada durdurulur
+@app.before_request
+def ban_gate():
+    if request.endpoint in ('static', 'logout') or not current_user.is_authenticated or not current_user.is_banned:
+        return None
+    if request.endpoint in JSON_ENDPOINTS:
+        return jsonify({'success': False, 'message': 'Hesabınız banlanmış!'}), 403
+    flash('Hesabınız banlanmış! Sebep: ' + (current_user.ban_reason or 'Belirtilmemiş'), 'danger')
+    return redirect(url_for('logout'))
+
+# Forum listesi için (is_pinned, date_posted, id) imleci
+def encode_post_cursor(post):
+    return f"{int(bool(post.is_pinned))}_{post.date_posted.strftime('%Y%m%d%H%M%S%f')}_{post.id}"
+
+def decode_post_cursor(cursor):
+    try:
+        pinned, date_posted, post_id = cursor.split('_')
+        return bool(int(pinned)), datetime.strptime(date_posted, '%Y%m%d%H%M%S%f'), int(post_id)
+    except (AttributeError, ValueError):
+        return None
+
+# Konu sayfasındaki yorumlar için (date_posted, id) imleci
+def encode_comment_cursor(comment):
+    return f"{comment.date_posted.strftime('%Y%m%d%H%M%S%f')}_{comment.id}"
+
+def decode_comment_cursor(cursor):
+    try:
+        date_posted, comment_id = cursor.split('_')
+        return datetime.strptime(date_posted, '%Y%m%d%H%M%S%f'), int(comment_id)
+    except (AttributeError, ValueError):
+        return None
+
+# Sayaçlar tek bir UPDATE ile artırılır/azaltılır
+def bump_counter(model, item_id, column, delta):
+    model.query.filter(model.id == item_id).update({column: column + delta})
+
+# Arama sonuçları için (rank, id) imleci
+def encode_search_cursor(rank, post_id):
+    return f"{rank!r}_{post_id}"
+
+def decode_search_cursor(cursor):
+    try:
+        rank, post_id = cursor.split('_')
+        return float(rank), int(post_id)
+    except (AttributeError, ValueError):
+        return None
+
+# Tam metin arama: PostgreSQL'de tsvector/GIN, SQLite'ta FTS5 tablosu
+TURKISH_CASE_FOLD = str.maketrans({'İ': 'i', 'I': 'ı'})
+TURKISH_ASCII_FOLD = str.maketrans('çğıöşüâîû', 'cgiosuaiu')
+
+search_state = {}
+
+def fold_search_text(text):
+    return (text or '').translate(TURKISH_CASE_FOLD).lower().translate(TURKISH_ASCII_FOLD)
+
+def search_terms(search_query):
+    return re.findall(r'\w+', fold_search_text(search_query))[:8]
+
+def search_backend():
+    if 'backend' not in search_state:
+        backend = None
+        if db.engine.dialect.name == 'postgresql':
+            backend = 'postgresql'
+        elif db.engine.dialect.name == 'sqlite':
+            options = db.session.execute(db.text('PRAGMA compile_options')).scalars().all()
+            if 'ENABLE_FTS5' in options:
+                backend = 'sqlite'
+        search_state['backend'] = backend
+    return search_state['backend']
+
+def init_search_index():
+    if search_backend() == 'postgresql':
+        db.session.execute(db.text(
+            "CREATE TABLE IF NOT EXISTS post_search ("
+            "post_id INTEGER PRIMARY KEY REFERENCES post(id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        ))
+        db.session.execute(db.text("CREATE INDEX IF NOT EXISTS ix_post_search_document ON post_search USING GIN (document)"))
+    elif search_backend() == 'sqlite':
+        db.session.execute(db.text("CREATE VIRTUAL TABLE IF NOT EXISTS post_search USING fts5(title, content)"))
+    db.session.commit()
+
+def index_posts(posts):
+    rows = [{'id': post.id, 'title': fold_search_text(post.title), 'content': fold_search_text(post.content)} for post in posts]
+    if not rows:
+        return
+    if search_backend() == 'postgresql':
+        db.session.execute(db.text(
+            "INSERT INTO post_search (post_id, document) VALUES (:id, "
+            "setweight(to_tsvector('simple', :title), 'A') || setweight(to_tsvector('simple', :content), 'B')) "
+            "ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document"
+        ), rows)
+    elif search_backend() == 'sqlite':
+        db.session.execute(db.text("DELETE FROM post_search WHERE rowid = :id"), rows)
+        db.session.execute(db.text("INSERT INTO post_search (rowid, title, content) VALUES (:id, :title, :content)"), rows)
+
+# Dizin birincil anahtar sırasıyla, her parti ayrı transaction'da doldurulur
+def reindex_posts(batch_size=1000):
+    if search_backend() is None:
+        return
+    last_id = 0
+    while True:
+        posts = Post.query.options(db.load_only(Post.title, Post.content)).filter(Post.id > last_id).order_by(Post.id).limit(batch_size).all()
+        if not posts:
+            break
+        index_posts(posts)
+        db.session.commit()
+        last_id = posts[-1].id
+        db.session.expunge_all()
+
+def unindex_posts(post_ids):
+    if search_backend() == 'postgresql':
+        statement = db.text("DELETE FROM post_search WHERE post_id IN :ids")
+    elif search_backend() == 'sqlite':
+        statement = db.text("DELETE FROM post_search WHERE rowid IN :ids")
+    else:
+        return
+    db.session.execute(statement.bindparams(db.bindparam('ids', expanding=True)), {'ids': list(post_ids)})
+
+def search_subquery(search_query):
+    terms = search_terms(search_query)
+    if not terms:
+        return None
+    if search_backend() == 'postgresql':
+        statement = db.text(
+            "SELECT post_id, ts_rank(document, to_tsquery('simple', :q)) AS rank "
+            "FROM post_search WHERE document @@ to_tsquery('simple', :q)"
+        ).bindparams(q=' & '.join(f'{term}:*' for term in terms))
+    elif search_backend() == 'sqlite':
+        statement = db.text(
+            "SELECT rowid AS post_id, -bm25(post_search, 10.0, 1.0) AS rank "
+            "FROM post_search WHERE post_search MATCH :q"
+        ).bindparams(q=' '.join(f'"{term}"*' for term in terms))
+    else:
+        return None
+    return statement.columns(post_id=db.Integer, rank=db.Float).subquery('search')
+
+# PostgreSQL ve SQLite'ta ON CONFLICT destekleyen INSERT
+def upsert_insert(model):
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql.insert(model)
+    if db.engine.dialect.name == 'sqlite':
+        return sqlite.insert(model)
+    return None
+
+# Toplu ekleme; tekil anahtar çakışmalarını sessizce atlar
+def insert_ignoring_conflicts(model, rows):
+    if not rows:
+        return
+    statement = upsert_insert(model)
+    statement = statement.on_conflict_do_nothing() if statement is not None else db.insert(model)
+    db.session.execute(statement, rows)
+
+# Beğeni ekleme/kaldırma tekil indeks üzerinden atomik yapılır; sayaç da aynı ifadede güncellenir
+LIKE_TARGETS = {'post': 'post_id', 'comment': 'comment_id'}
+
+def like_change_statement(user_id, item_type, item_id, like):
+    column = getattr(Like, LIKE_TARGETS[item_type])
+    if like:
+        statement = upsert_insert(Like)
+        statement = statement.on_conflict_do_nothing() if statement is not None else db.insert(Like)
+        statement = statement.values(user_id=user_id, **{column.key: item_id})
+    else:
+        statement = db.delete(Like).where(Like.user_id == user_id, column == item_id)
+    return statement.returning(Like.id)
+
+def change_like(user_id, item_type, item_id, like):
+    model = Post if item_type == 'post' else Comment
+    delta = 1 if like else -1
+    change = like_change_statement(user_id, item_type, item_id, like)
+    
+    if db.engine.dialect.name == 'postgresql':
+        # INSERT/DELETE ... RETURNING bir CTE içinde, sayaç UPDATE'i ile tek ifade
+        changed = db.select(db.func.count()).select_from(change.cte('changed')).scalar_subquery()
+        like_count, changed = db.session.execute(db.update(model).where(model.id == item_id).values(
+            like_count=model.like_count + delta * changed
+        ).returning(model.like_count, changed)).one()
+    else:
+        changed = len(db.session.execute(change).all())
+        like_count = db.session.execute(db.update(model).where(model.id == item_id).values(
+            like_count=model.like_count + delta * changed
+        ).returning(model.like_count)).scalar()
+    return bool(changed), like_count
+
+def toggle_like(user_id, item_type, item_id, action='toggle'):
+    if action != 'like':
+        changed, like_count = change_like(user_id, item_type, item_id, False)
+        if changed or action == 'unlike':
+            return False, like_count, changed
+    changed, like_count = change_like(user_id, item_type, item_id, True)
+    return True, like_count, changed
+
+def retain_blob(key, size):
+    now = datetime.utcnow()
+    statement = upsert_insert(Blob)
+    if statement is not None:
+        db.session.execute(statement.values(key=key, size=size, ref_count=1, created_at=now, updated_at=now).on_conflict_do_update(
+            index_elements=['key'], set_={'ref_count': Blob.ref_count + 1, 'updated_at': now}))
+    elif not Blob.query.filter(Blob.key == key).update({Blob.ref_count: Blob.ref_count + 1, Blob.updated_at: now}):
+        db.session.add(Blob(key=key, size=size, ref_count=1))
+
+# Kategori/ünite ağacı süreç içinde önbelleğe alınır, sürüm damgası değişince yenilenir
+CachedCategory = namedtuple('CachedCategory', 'id name class_level units')
+CachedUnit = namedtuple('CachedUnit', 'id name category_id')
+
+taxonomy_state = {}
+taxonomy_lock = threading.Lock()
+
+def bump_taxonomy_version():
+    if not TaxonomyVersion.query.update({TaxonomyVersion.version: TaxonomyVersion.version + 1}):
+        db.session.add(TaxonomyVersion(id=1, version=1))
+
+def load_taxonomy(version):
+    tree = {}
+    categories = []
+    units_by_category = {}
+    for category in Category.query.options(db.selectinload(Category.units)).order_by(Category.id).all():
+        units = tuple(CachedUnit(unit.id, unit.name, unit.category_id) for unit in sorted(category.units, key=lambda u: u.id))
+        cached = CachedCategory(category.id, category.name, category.class_level, units)
+        tree.setdefault(category.class_level, {})[category.id] = cached
+        categories.append(cached)
+        units_by_category[category.id] = units
+    return {
+        'version': version,
+        'checked_at': time.monotonic(),
+        'tree': tree,
+        'categories': categories,
+        'units': [unit for category in categories for unit in category.units],
+        'units_by_category': units_by_category,
+    }
+
+def get_taxonomy():
+    taxonomy = taxonomy_state.get('taxonomy')
+    interval = app.config['TAXONOMY_CHECK_INTERVAL']
+    if taxonomy and time.monotonic() - taxonomy['checked_at'] < interval:
+        return taxonomy
+    with taxonomy_lock:
+        taxonomy = taxonomy_state.get('taxonomy')
+        if taxonomy and time.monotonic() - taxonomy['checked_at'] < interval:
+            return taxonomy
+        version = db.session.execute(db.select(TaxonomyVersion.version)).scalar() or 0
+        if taxonomy and taxonomy['version'] == version:
+            taxonomy = dict(taxonomy, checked_at=time.monotonic())
+        else:
+            taxonomy = load_taxonomy(version)
+        taxonomy_state['taxonomy'] = taxonomy
+    return taxonomy
+
+def taxonomy_for_levels(*class_levels):
+    categories = [category for category in get_taxonomy()['categories'] if category.class_level in class_levels]
+    return categories, [unit for category in categories for unit in category.units]
+
+# Bildirim yayını: yeni bildirimler commit sonrası abone olan sekmelere iletilir
+class LocalNotificationBus:
+    def __init__(self):
+        self.subscribers = {}
+        self.lock = threading.Lock()
+    
+    def subscribe(self, user_id):
+        subscription = queue.Queue(maxsize=100)
+        with self.lock:
+            self.subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+    
+    def unsubscribe(self, user_id, subscription):
+        with self.lock:
+            subscriptions = self.subscribers.get(user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscribers.pop(user_id, None)
+    
+    def publish(self, user_id, payload):
+        self.deliver(user_id, payload)
+    
+    def deliver(self, user_id, payload):
+        with self.lock:
+            subscriptions = list(self.subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.put_nowait(payload)
+            except queue.Full:
+                pass
+
+class PostgresNotificationBus(LocalNotificationBus):
+    # Birden fazla worker LISTEN/NOTIFY üzerinden aynı olayları paylaşır
+    channel = 'beyinmatik_notifications'
+    
+    def __init__(self):
+        super().__init__()
+        self.engine = None
+        self.listener = None
+    
+    def publish(self, user_id, payload):
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.execute(db.text("SELECT pg_notify(:channel, :payload)"),
+                               {'channel': self.channel, 'payload': json.dumps({'user_id': user_id, 'payload': payload})})
+    
+    def subscribe(self, user_id):
+        with self.lock:
+            if self.listener is None or not self.listener.is_alive():
+                self.engine = db.engine
+                self.listener = threading.Thread(target=self.listen, daemon=True)
+                self.listener.start()
+        return super().subscribe(user_id)
+    
+    def listen(self):
+        while True:
+            connection = None
+            try:
+                connection = self.engine.raw_connection()
+                dbapi_connection = connection.dbapi_connection
+                dbapi_connection.autocommit = True
+                dbapi_connection.cursor().execute(f"LISTEN {self.channel}")
+                while True:
+                    if select.select([dbapi_connection], [], [], 30) == ([], [], []):
+                        continue
+                    dbapi_connection.poll()
+                    while dbapi_connection.notifies:
+                        message = json.loads(dbapi_connection.notifies.pop(0).payload)
+                        self.deliver(message['user_id'], message['payload'])
+            except Exception:
+                app.logger.exception('Bildirim dinleyicisi bağlantısı koptu')
+                time.sleep(5)
+            finally:
+                if connection is not None:
+                    connection.invalidate()
+
+def create_notification_bus(backend):
+    if backend == 'postgresql':
+        return PostgresNotificationBus()
+    return LocalNotificationBus()
+
+notification_bus = create_notification_bus(app.config['NOTIFICATION_BACKEND'])
+
+def notification_to_dict(notification):
+    return {
+        "id": notification.id, 
+        "message": notification.message, 
+        "link": notification.link,
+        "date_created": notification.date_created.strftime('%d.%m.%Y %H:%M')
+    }
+
+def queue_notification_events(session, notifications):
+    session.info.setdefault('notification_outbox', []).extend(
+        (notification.user_id, notification_to_dict(notification)) for notification in notifications)
+
+@event.listens_for(Notification, 'after_insert')
+def queue_notification_event(mapper, connection, notification):
+    queue_notification_events(object_session(notification), [notification])
+
+@event.listens_for(Session, 'after_commit')
+def publish_notification_events(session):
+    for user_id, payload in session.info.pop('notification_outbox', []):
+        notification_bus.publish(user_id, payload)
+
+@event.listens_for(Session, 'after_rollback')
+def discard_notification_events(session):
+    session.info.pop('notification_outbox', None)
+
+# Beğeni bildirimleri (alıcı, içerik) başına biriktirilip toplu olarak yazılır;
+# alıcının aynı bağlantıda görülmemiş beğeni bildirimi varsa yenisi eklenmez, o güncellenir
+LIKE_NOTIFICATION_SUFFIX = ' içeriğinizi beğendi!'
+LIKE_NOTIFICATION_OTHERS = re.compile(r' ve (\d+) kişi daha içeriğinizi beğendi!$')
+
+def like_notification_message(latest, count):
+    if count == 1:
+        return f"{latest}{LIKE_NOTIFICATION_SUFFIX}"
+    return f"{latest} ve {count - 1} kişi daha{LIKE_NOTIFICATION_SUFFIX}"
+
+def like_notification_count(message):
+    match = LIKE_NOTIFICATION_OTHERS.search(message)
+    return int(match.group(1)) + 1 if match else 1
+
+class LikeNotificationBuffer:
+    def __init__(self):
+        self.pending = {}
+        self.size = 0
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.flusher = None
+    
+    def add(self, recipient_id, target, link, username):
+        with self.lock:
+            entry = self.pending.setdefault((recipient_id, target), {'link': link, 'names': {}})
+            if username not in entry['names']:
+                entry['names'][username] = None
+                self.size += 1
+            full = self.size >= app.config['LIKE_NOTIFICATION_BATCH_SIZE']
+            if self.flusher is None or not self.flusher.is_alive():
+                self.flusher = threading.Thread(target=self.run, daemon=True)
+                self.flusher.start()
+        if full:
+            self.wakeup.set()
+    
+    def discard(self, recipient_id, target, username):
+        with self.lock:
+            entry = self.pending.get((recipient_id, target))
+            if entry and username in entry['names']:
+                del entry['names'][username]
+                self.size -= 1
+                if not entry['names']:
+                    del self.pending[(recipient_id, target)]
+    
+    def run(self):
+        while True:
+            self.wakeup.wait(app.config['LIKE_NOTIFICATION_FLUSH_INTERVAL'])
+            self.wakeup.clear()
+            try:
+                with app.app_context():
+                    self.flush()
+            except Exception:
+                app.logger.exception('Beğeni bildirimleri yazılamadı')
+    
+    def flush(self):
+        with self.lock:
+            pending, self.pending, self.size = self.pending, {}, 0
+        if not pending:
+            return
+        
+        # Yazıya ve yorumlarına gelen beğeniler aynı bağlantıyı paylaşır, tek bildirimde toplanır
+        groups = {}
+        for (recipient_id, target), entry in pending.items():
+            groups.setdefault((recipient_id, entry['link']), {}).update(entry['names'])
+        
+        # Bu arada silinmiş kullanıcılara bildirim yazılmaz
+        recipients = set(db.session.execute(db.select(User.id).where(User.id.in_({recipient_id for recipient_id, link in groups}))).scalars())
+        groups = {key: names for key, names in groups.items() if key[0] in recipients}
+        if not groups:
+            return
+        
+        existing = {}
+        for notification in Notification.query.filter(
+            db.tuple_(Notification.user_id, Notification.link).in_(list(groups)),
+            Notification.seen == False,
+            Notification.message.endswith(LIKE_NOTIFICATION_SUFFIX)
+        ).order_by(Notification.id):
+            existing[(notification.user_id, notification.link)] = notification
+        
+        now = datetime.utcnow()
+        rows = []
+        updated = []
+        for (recipient_id, link), names in groups.items():
+            names = list(names)
+            notification = existing.get((recipient_id, link))
+            if notification is None:
+                rows.append({'user_id': recipient_id, 'message': like_notification_message(names[-1], len(names)),
+                             'link': link, 'seen': False, 'date_created': now})
+            else:
+                notification.message = like_notification_message(names[-1], like_notification_count(notification.message) + len(names))
+                notification.date_created = now
+                updated.append(notification)
+        
+        if rows:
+            notifications = db.session.execute(db.insert(Notification).returning(Notification), rows).scalars().all()
+            queue_notification_events(db.session, notifications)
+        queue_notification_events(db.session, updated)
+        db.session.commit()
+
+like_notifications = LikeNotificationBuffer()
+
+@atexit.register
+def flush_like_notifications():
+    with app.app_context():
+        like_notifications.flush()
+
+# Render edilmiş sayfa parçaları: süreç içi LRU+TTL katmanı ve isteğe bağlı ortak (Redis) katman.
+# Her etiketin bir nesil sayacı vardır; geçersiz kılmak sayacı artırır, eski anahtarlar kendiliğinden düşer.
+# Ortak katman yoksa sayaçlar veritabanında tutulur ki diğer işçiler de geçersiz kılmayı görsün.
+class RedisFragmentStore:
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+    
+    def get(self, key):
+        try:
+            return self.client.get(key)
+        except redis.RedisError:
+            app.logger.exception('Ortak önbellek okunamadı')
+            return None
+    
+    def set(self, key, value, ttl):
+        try:
+            self.client.set(key, value, ex=ttl)
+        except redis.RedisError:
+            app.logger.exception('Ortak önbelleğe yazılamadı')
+    
+    def incr(self, key):
+        try:
+            self.client.incr(key)
+        except redis.RedisError:
+            app.logger.exception('Ortak önbellek sayacı artırılamadı')
+
+def create_fragment_store(url):
+    if not url:
+        return None
+    if redis is None:
+        app.logger.warning('redis paketi kurulu değil, yalnızca süreç içi önbellek kullanılacak')
+        return None
+    return RedisFragmentStore(url)
+
+class FragmentCache:
+    def __init__(self, max_entries, ttl, shared=None, check_interval=0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+        self.check_interval = check_interval
+        self.entries = OrderedDict()
+        self.generations = {}
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'shared_hits': 0, 'misses': 0, 'invalidations': 0}
+    
+    def generation(self, tag):
+        if self.shared is not None:
+            return int(self.shared.get(f'fragment:gen:{tag}') or 0)
+        
+        # Her etiketin sayacı en fazla check_interval saniyede bir okunur
+        now = time.monotonic()
+        with self.lock:
+            cached = self.generations.get(tag)
+        if cached and now - cached[1] < self.check_interval:
+            return cached[0]
+        generation = db.session.execute(
+            db.select(FragmentGeneration.generation).where(FragmentGeneration.tag == tag)).scalar() or 0
+        with self.lock:
+            self.generations[tag] = (generation, now)
+        return generation
+    
+    def get_or_render(self, tag, key, render):
+        if self.ttl <= 0:
+            with self.lock:
+                self.stats['misses'] += 1
+            return render()
+        
+        cache_key = f'{tag}:{self.generation(tag)}:{key}'
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(cache_key)
+            if entry and entry[0] > now:
+                self.entries.move_to_end(cache_key)
+                self.stats['hits'] += 1
+                return entry[1]
+        
+        raw = self.shared.get(f'fragment:{cache_key}') if self.shared is not None else None
+        if raw is not None:
+            value = json.loads(raw)
+            stat = 'shared_hits'
+        else:
+            value = render()
+            stat = 'misses'
+            if self.shared is not None:
+                self.shared.set(f'fragment:{cache_key}', json.dumps(value), self.ttl)
+        
+        with self.lock:
+            self.stats[stat] += 1
+            self.entries[cache_key] = (now + self.ttl, value)
+            self.entries.move_to_end(cache_key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+    
+    def invalidate(self, *tags):
+        with self.lock:
+            self.stats['invalidations'] += len(tags)
+        if self.shared is not None:
+            for tag in tags:
+                self.shared.incr(f'fragment:gen:{tag}')
+            return
+        
+        # Çağıranın oturumundan bağımsız, kendi transaction'ında artırılır
+        with db.engine.begin() as connection:
+            for tag in tags:
+                statement = upsert_insert(FragmentGeneration)
+                if statement is not None:
+                    connection.execute(statement.values(tag=tag, generation=1).on_conflict_do_update(
+                        index_elements=['tag'], set_={'generation': FragmentGeneration.generation + 1}))
+                elif not connection.execute(db.update(FragmentGeneration).where(FragmentGeneration.tag == tag).values(
+                        generation=FragmentGeneration.generation + 1)).rowcount:
+                    connection.execute(db.insert(FragmentGeneration).values(tag=tag, generation=1))
+        # Bu işçi yeni sayacı bir sonraki okumada hemen görür
+        with self.lock:
+            for tag in tags:
+                self.generations.pop(tag, None)
+
+fragment_cache = FragmentCache(app.config['FRAGMENT_CACHE_MAX_ENTRIES'], app.config['FRAGMENT_CACHE_TTL'],
+                               create_fragment_store(app.config['FRAGMENT_CACHE_URL']),
+                               app.config['FRAGMENT_GENERATION_CHECK_INTERVAL'])
+
+# Liderlik tablosu sayfaları indeks üzerinden okunur, render edilmiş hali parça önbelleğinde tutulur
+LeaderboardEntry = namedtuple('LeaderboardEntry', 'position id username rank solution_count class_level')
+
+def leaderboard_filter(query, class_level):
+    query = query.where(User.is_banned == False)
+    if class_level:
+        query = query.where(User.class_level == class_level)
+    return query
+
+def leaderboard_page(class_level, page):
+    size = app.config['LEADERBOARD_PAGE_SIZE']
+    offset = (page - 1) * size
+    rows = db.session.execute(leaderboard_filter(
+        db.select(User.id, User.username, User.rank, User.solution_count, User.class_level), class_level
+    ).order_by(User.solution_count.desc(), User.id).offset(offset).limit(size + 1)).all()
+    
+    return [LeaderboardEntry(offset + i + 1, *row) for i, row in enumerate(rows[:size])], len(rows) > size
+
+def leaderboard_position(user, class_level):
+    if user.is_banned or (class_level and user.class_level != class_level):
+        return None
+    solution_count = user.solution_count or 0
+    ahead = db.session.execute(leaderboard_filter(db.select(db.func.count(User.id)), class_level).where(
+        (User.solution_count > solution_count) | ((User.solution_count == solution_count) & (User.id < user.id))
+    )).scalar()
+    return ahead + 1
+
+def invalidate_leaderboard():
+    fragment_cache.invalidate('leaderboard')
+
+# Kullanıcının beğendikleri sayfa başına tek bir IN sorgusuyla çözülür;
+# sonuçlar kullanıcı başına {tip: {id: beğendi mi}} olarak süreç içinde tutulur.
+# Her beğeni User.like_version'ı artırır, sürümü tutmayan kayıt başka bir işçide bayatlamıştır.
+like_state = OrderedDict()
+like_state_lock = threading.Lock()
+
+def like_version(user_id):
+    # user_cache'teki kopya bayat olabilir, sürüm istek başına bir kez birincil anahtarla okunur
+    if 'like_version' not in g:
+        g.like_version = db.session.execute(db.select(User.like_version).where(User.id == user_id)).scalar() or 0
+    return g.like_version
+
+def bump_like_version(user_id):
+    return db.session.execute(db.update(User).where(User.id == user_id).values(
+        like_version=db.func.coalesce(User.like_version, 0) + 1
+    ).returning(User.like_version)).scalar()
+
+def user_like_state(user_id):
+    version = like_version(user_id)
+    with like_state_lock:
+        state = like_state.get(user_id)
+        if state is None or state['version'] != version:
+            state = {'version': version, 'post': {}, 'comment': {}}
+            like_state[user_id] = state
+        like_state.move_to_end(user_id)
+        while len(like_state) > app.config['LIKE_STATE_MAX_USERS']:
+            like_state.popitem(last=False)
+        return state
+
+def prefetch_likes(post_ids=(), comment_ids=()):
+    if not current_user.is_authenticated:
+        return
+    
+    state = user_like_state(current_user.id)
+    missing_posts = {i for i in post_ids if i not in state['post']}
+    missing_comments = {i for i in comment_ids if i not in state['comment']}
+    if not missing_posts and not missing_comments:
+        return
+    
+    rows = db.session.execute(db.select(Like.post_id, Like.comment_id).where(
+        Like.user_id == current_user.id,
+        db.or_(Like.post_id.in_(missing_posts), Like.comment_id.in_(missing_comments))
+    )).all()
+    liked_posts = {post_id for post_id, comment_id in rows}
+    liked_comments = {comment_id for post_id, comment_id in rows}
+    
+    state['post'].update((i, i in liked_posts) for i in missing_posts)
+    state['comment'].update((i, i in liked_comments) for i in missing_comments)
+
+def is_liked(item_type, item_id):
+    if not current_user.is_authenticated:
+        return False
+    prefetch_likes(**{f'{item_type}_ids': (item_id,)})
+    return user_like_state(current_user.id)[item_type][item_id]
+
+def remember_likes(user_id, version, likes):
+    with like_state_lock:
+        state = like_state.get(user_id)
+        if state is None or state['version'] != version - 1:
+            # Arada başka bir işçide beğeni olduysa eldeki kayıtlara güvenilmez
+            state = {'version': version, 'post': {}, 'comment': {}}
+            like_state[user_id] = state
+        state['version'] = version
+        for item_type, item_id, liked in likes:
+            state[item_type][item_id] = liked
+    g.like_version = version
+
+@app.context_processor
+def inject_like_state():
+    return {'is_liked': is_liked}
+
+# Toplu moderasyon: satır satır döngü yerine küme tabanlı ifadeler
+def delete_posts(post_ids):
+    post_ids = list(post_ids)
+    if not post_ids:
+        return set()
+    
+    post_comments = db.select(Comment.id).where(Comment.post_id.in_(post_ids))
+    Like.query.filter(db.or_(Like.post_id.in_(post_ids), Like.comment_id.in_(post_comments))).delete(synchronize_session=False)
+    
+    # Sayaçlar ve dosyalar yalnızca bu transaction'ın gerçekten sildiği satırlar için düşülür;
+    # aynı konuyu eşzamanlı silen ikinci istek boş sonuç alır
+    comments = db.session.execute(db.delete(Comment).where(Comment.post_id.in_(post_ids)).returning(
+        Comment.user_id, Comment.image, Comment.image_medium
+    ).execution_options(synchronize_session=False)).all()
+    unindex_posts(post_ids)
+    posts = db.session.execute(db.delete(Post).where(Post.id.in_(post_ids)).returning(
+        Post.user_id, Post.image, Post.image_medium
+    ).execution_options(synchronize_session=False)).all()
+    
+    users_by_count = defaultdict(list)
+    for user_id, count in Counter(row.user_id for row in comments).items():
+        users_by_count[count].append(user_id)
+    for count, user_ids in users_by_count.items():
+        User.query.filter(User.id.in_(user_ids)).update(
+            {User.comment_count: User.comment_count - count}, synchronize_session=False)
+    
+    release_uploads([(row.image, row.image_medium) for row in comments + posts if row.image])
+    return {row.user_id for row in comments + posts}
+
+def set_users_banned(user_ids, banned, reason=None):
+    user_ids = list(db.session.execute(db.select(User.id).where(User.id.in_(user_ids), User.is_admin == False)).scalars())
+    if user_ids:
+        User.query.filter(User.id.in_(user_ids)).update(
+            {User.is_banned: banned, User.ban_reason: reason if banned else None}, synchronize_session=False)
+    return user_ids
+
+def invalidate_moderated(user_ids):
+    invalidate_leaderboard()
+    fragment_cache.invalidate('forum')
+    for user_id in user_ids:
+        invalidate_user(user_id)
+
+# Büyük alt ağaçlar (konu ya da kullanıcı) arka planda, sınırlı boyutlu transaction'larla silinir
+def purge_likes(condition, batch_size):
+    while True:
+        ids = db.session.execute(db.select(Like.id).where(condition).limit(batch_size)).scalars().all()
+        if not ids:
+            return
+        rows = db.session.execute(db.delete(Like).where(Like.id.in_(ids)).returning(Like.post_id, Like.comment_id)
+                                  .execution_options(synchronize_session=False)).all()
+        for model, counts in ((Post, Counter(post_id for post_id, comment_id in rows if post_id)),
+                              (Comment, Counter(comment_id for post_id, comment_id in rows if comment_id))):
+            for item_id, count in counts.items():
+                bump_counter(model, item_id, model.like_count, -count)
+        db.session.commit()
+
+def purge_comments(condition, batch_size):
+    affected = set()
+    while True:
+        ids = db.session.execute(db.select(Comment.id).where(condition).limit(batch_size)).scalars().all()
+        if not ids:
+            return affected
+        purge_likes(Like.comment_id.in_(ids), batch_size)
+        rows = db.session.execute(db.delete(Comment).where(Comment.id.in_(ids)).returning(
+            Comment.user_id, Comment.post_id, Comment.image, Comment.image_medium
+        ).execution_options(synchronize_session=False)).all()
+        for user_id, count in Counter(row.user_id for row in rows).items():
+            bump_counter(User, user_id, User.comment_count, -count)
+        for post_id, count in Counter(row.post_id for row in rows).items():
+            bump_counter(Post, post_id, Post.comment_count, -count)
+        release_uploads([(row.image, row.image_medium) for row in rows if row.image])
+        db.session.commit()
+        affected.update(row.user_id for row in rows)
+
+def purge_notifications(condition, batch_size):
+    while True:
+        ids = db.session.execute(db.select(Notification.id).where(condition).limit(batch_size)).scalars().all()
+        if not ids:
+            return
+        Notification.query.filter(Notification.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+def purge_post(post_id, batch_size):
+    if db.session.get(Post, post_id) is None:
+        return set()
+    affected = purge_comments(Comment.post_id == post_id, batch_size)
+    purge_likes(Like.post_id == post_id, batch_size)
+    purge_notifications(Notification.link == f"/post/{post_id}", batch_size)
+    
+    unindex_posts([post_id])
+    # Dosyalar yalnızca satırı bu transaction sildiyse bırakılır
+    row = db.session.execute(db.delete(Post).where(Post.id == post_id).returning(
+        Post.user_id, Post.image, Post.image_medium
+    ).execution_options(synchronize_session=False)).first()
+    if row:
+        affected.add(row.user_id)
+        release_upload(row.image, row.image_medium)
+    db.session.commit()
+    return affected
+
+def purge_user(user_id, batch_size):
+    user = db.session.get(User, user_id)
+    if user is None:
+        return set()
+    affected = {user_id}
+    for post_id in db.session.execute(db.select(Post.id).where(Post.user_id == user_id)).scalars().all():
+        affected |= purge_post(post_id, batch_size)
+    affected |= purge_comments(Comment.user_id == user_id, batch_size)
+    purge_likes(Like.user_id == user_id, batch_size)
+    purge_notifications(Notification.user_id == user_id, batch_size)
+    
+    row = db.session.execute(db.delete(User).where(User.id == user_id).returning(
+        User.profile_picture, User.profile_picture_thumb
+    ).execution_options(synchronize_session=False)).first()
+    if row:
+        release_upload(row.profile_picture, row.profile_picture_thumb)
+    db.session.commit()
+    return affected
+
+PURGE_HANDLERS = {'post': purge_post, 'user': purge_user}
+
+def enqueue_purge(kind, target_ids):
+    db.session.add_all(PurgeJob(kind=kind, target_id=target_id) for target_id in target_ids)
+
+def run_purge_jobs(batch_size=None):
+    batch_size = batch_size or app.config['PURGE_BATCH_SIZE']
+    done = 0
+    while True:
+        job_id = db.session.execute(db.select(PurgeJob.id).order_by(PurgeJob.id).limit(1)).scalar()
+        if job_id is None:
+            return done
+        # İş silinerek sahiplenilir; her işçinin zamanlayıcısı ve `flask purge` aynı işi ikinci kez yürütmez
+        job = db.session.execute(db.delete(PurgeJob).where(PurgeJob.id == job_id).returning(
+            PurgeJob.kind, PurgeJob.target_id)).first()
+        db.session.commit()
+        if job is None:
+            continue
+        try:
+            affected = PURGE_HANDLERS[job.kind](job.target_id, batch_size)
+        except Exception:
+            # Yarım kalan iş sıraya geri konur; parçalar tekrar çalıştırılabilir
+            db.session.rollback()
+            enqueue_purge(job.kind, [job.target_id])
+            db.session.commit()
+            raise
+        
+        invalidate_moderated(affected)
+        done += 1
+
+purge_state = {}
+purge_lock = threading.Lock()
+
+def purge_executor():
+    with purge_lock:
+        if 'executor' not in purge_state:
+            # Tek iş parçacığı: silme işleri sırayla yürür, tablolara aynı anda tek yazıcı gider
+            purge_state['executor'] = ThreadPoolExecutor(max_workers=1, thread_name_prefix='purge')
+        return purge_state['executor']
+
+def purge_worker():
+    try:
+        with app.app_context():
+            run_purge_jobs()
+    except Exception:
+        app.logger.exception('Silme işi tamamlanamadı')
+
+def schedule_purge():
+    purge_executor().submit(purge_worker)
+
+# Şifre özetleri ayrı süreçlerde hesaplanır; pahalı özet istek iş parçacıklarını ve GIL'i tutmaz.
+# Kuyruk dolduysa ya da süre aşıldıysa istek beklemek yerine "sunucu yoğun" yanıtı alır.
+class PasswordHashBusy(Exception):
+    pass
+
+password_hash_state = {'pending': 0}
+password_hash_stats = {'hash': [0, 0.0], 'check': [0, 0.0], 'rejected': 0}
+password_hash_lock = threading.Lock()
+
+def password_hash_executor():
+    with password_hash_lock:
+        if 'executor' not in password_hash_state:
+            # spawn: çok iş parçacıklı süreçten fork güvenli değildir; çocuklar yalnızca werkzeug'u yükler
+            password_hash_state['executor'] = ProcessPoolExecutor(
+                max_workers=app.config['PASSWORD_HASH_WORKERS'], mp_context=multiprocessing.get_context('spawn'))
+        return password_hash_state['executor']
+
+def password_hash_done(future):
+    with password_hash_lock:
+        password_hash_state['pending'] -= 1
+
+def run_password_hash(operation, function, *args):
+    if app.config['PASSWORD_HASH_WORKERS']:
+        # Kuyruk doluysa beklemeden reddedilir; sınır bekleyen iş parçacıklarının sayısını da sınırlar
+        with password_hash_lock:
+            if password_hash_state['pending'] >= app.config['PASSWORD_HASH_QUEUE_LIMIT']:
+                password_hash_stats['rejected'] += 1
+                raise PasswordHashBusy()
+            password_hash_state['pending'] += 1
+    
+    started = time.perf_counter()
+    try:
+        if not app.config['PASSWORD_HASH_WORKERS']:
+            return function(*args)
+        try:
+            future = password_hash_executor().submit(function, *args)
+        except BaseException:
+            password_hash_done(None)
+            raise
+        # Sayaç iş gerçekten bittiğinde düşer; süresi aşılıp hâlâ çalışan işler de kuyrukta sayılır
+        future.add_done_callback(password_hash_done)
+        try:
+            return future.result(timeout=app.config['PASSWORD_HASH_TIMEOUT'])
+        except FuturesTimeoutError:
+            future.cancel()
+            with password_hash_lock:
+                password_hash_stats['rejected'] += 1
+            raise PasswordHashBusy()
+    finally:
+        with password_hash_lock:
+            password_hash_stats[operation][0] += 1
+            password_hash_stats[operation][1] += time.perf_counter() - started
+
+def hash_password(password):
+    return run_password_hash('hash', generate_password_hash, password, app.config['PASSWORD_HASH_METHOD'])
+
+def password_hash_prefix():
+    # Yapılandırılan yöntemin özetlerde görünen hali (ör. "scrypt" -> "scrypt:32768:8:1")
+    method = app.config['PASSWORD_HASH_METHOD']
+    if password_hash_state.get('method') != method:
+        password_hash_state['prefix'] = hash_password('').split('$', 1)[0]
+        password_hash_state['method'] = method
+    return password_hash_state['prefix']
+
+def verify_password(user, password):
+    if not run_password_hash('check', check_password_hash, user.password, password):
+        return False
+    try:
+        if user.password.split('$', 1)[0] != password_hash_prefix():
+            user.password = hash_password(password)
+            db.session.commit()
+            invalidate_user(user.id)
+    except PasswordHashBusy:
+        # Yeniden özetleme bir sonraki girişe kalır, giriş engellenmez
+        pass
+    return True
+
+@app.errorhandler(PasswordHashBusy)
+def password_hash_busy(error):
+    flash('Sunucu şu anda çok yoğun! Lütfen birazdan tekrar deneyin.', 'warning')
+    response = redirect(request.referrer or url_for('login'))
+    response.headers['Retry-After'] = '5'
+    return response
 
 def update_rank(user):
     if user.is_admin:
@@ -124,7 +1729,6 @@ def update_rank(user):
         user.rank = "Aktif Üye"
     else:
         user.rank = "Çaylak Üye"
-    db.session.commit()
 
 def init_categories():
     categories_data = {
@@ -158,20 +1762,34 @@ def init_categories():
         }
     }
     
-    for class_level, categories in categories_data.items():
-        for category_name, units in categories.items():
-            category = Category.query.filter_by(name=category_name, class_level=class_level).first()
-            if not category:
-                category = Category(name=category_name, class_level=class_level)
-                db.session.add(category)
-                db.session.commit()
-            
-            for unit_name in units:
-                unit = Unit.query.filter_by(name=unit_name, category_id=category.id).first()
-                if not unit:
-                    unit = Unit(name=unit_name, category_id=category.id)
-                    db.session.add(unit)
+    # Mevcut kayıtları tek sorguyla okuyup eksikleri toplu olarak ekle
+    def load_category_ids():
+        return {(name, class_level): category_id for category_id, name, class_level
+                in db.session.execute(db.select(Category.id, Category.name, Category.class_level))}
+    
+    category_ids = load_category_ids()
+    missing_categories = [
+        {'name': category_name, 'class_level': class_level}
+        for class_level, categories in categories_data.items()
+        for category_name in categories
+        if (category_name, class_level) not in category_ids
+    ]
+    if missing_categories:
+        insert_ignoring_conflicts(Category, missing_categories)
+        category_ids = load_category_ids()
     
+    existing_units = set(db.session.execute(db.select(Unit.category_id, Unit.name)).all())
+    missing_units = [
+        {'category_id': category_ids[(category_name, class_level)], 'name': unit_name}
+        for class_level, categories in categories_data.items()
+        for category_name, units in categories.items()
+        for unit_name in units
+        if (category_ids[(category_name, class_level)], unit_name) not in existing_units
+    ]
+    insert_ignoring_conflicts(Unit, missing_units)
+    
+    if missing_categories or missing_units:
+        bump_taxonomy_version()
     db.session.commit()
 
 @app.route('/')
@@ -182,13 +1800,13 @@ def index():
 def register():
     if request.method == 'POST':
         username = request.form['username']
-        password = generate_password_hash(request.form['password'])
         class_level = request.form['class_level']
         
         if User.query.filter_by(username=username).first():
             flash('Bu kullanıcı adı zaten kullanılıyor!', 'danger')
             return redirect(url_for('register'))
-            
+        
+        password = hash_password(request.form['password'])
         new_user = User(username=username, password=password, class_level=class_level)
         db.session.add(new_user)
         db.session.commit()
@@ -205,7 +1823,7 @@ def login():
         password = request.form['password']
         user = User.query.filter_by(username=username).first()
         
-        if user and check_password_hash(user.password, password):
+        if user and verify_password(user, password):
             if user.is_banned:
                 flash('Hesabınız banlanmış! Sebep: ' + (user.ban_reason or 'Belirtilmemiş'), 'danger')
                 return redirect(url_for('login'))
@@ -218,22 +1836,11 @@ def login():
     
     return render_template('login.html')
 
-@app.route('/forum')
-@login_required
-def forum():
-    if current_user.is_banned:
-        flash('Hesabınız banlanmış! Foruma erişim izniniz yok.', 'danger')
-        return redirect(url_for('logout'))
-        
-    class_level = request.args.get('class_level', current_user.class_level)
-    category_id = request.args.get('category_id', type=int)
-    unit_id = request.args.get('unit_id', type=int)
-    search_query = request.args.get('q', '')
-    
-    query = Post.query.join(User).filter(User.is_banned == False)
+def forum_post_query(class_level, category_id, unit_id, search_query):
+    query = Post.query.join(Post.author).outerjoin(Post.category).filter(User.is_banned == False)
     
     if class_level and class_level != 'Hepsi':
-        query = query.join(Category).filter(Category.class_level == class_level)
+        query = query.filter(Category.class_level == class_level)
     
     if category_id:
         query = query.filter(Post.category_id == category_id)
@@ -241,37 +1848,97 @@ def forum():
     if unit_id:
         query = query.filter(Post.unit_id == unit_id)
     
-    if search_query:
+    search = search_subquery(search_query) if search_query else None
+    if search is not None:
+        query = query.join(search, search.c.post_id == Post.id)
+    elif search_query:
         query = query.filter(Post.title.ilike(f'%{search_query}%') | Post.content.ilike(f'%{search_query}%'))
+    return query, search
+
+def count_forum_posts(class_level, category_id, unit_id, search_query):
+    query, search = forum_post_query(class_level, category_id, unit_id, search_query)
+    return list(query.with_entities(
+        db.func.count(Post.id),
+        db.func.count(db.case((Post.is_solved == True, 1))),
+        db.func.count(db.case((Post.is_pinned == True, 1)))
+    ).one())
+
+def render_forum_posts(class_level, category_id, unit_id, search_query, after):
+    query, search = forum_post_query(class_level, category_id, unit_id, search_query)
+    query = query.options(
+        db.contains_eager(Post.author),
+        db.contains_eager(Post.category),
+        db.joinedload(Post.unit)
+    )
+    per_page = app.config['POSTS_PER_PAGE']
+    
+    if search is not None:
+        # Arama sonuçları alaka düzeyine göre sıralanır
+        cursor = decode_search_cursor(after)
+        if cursor:
+            rank, post_id = cursor
+            query = query.filter(db.or_(
+                search.c.rank < rank,
+                db.and_(search.c.rank == rank, Post.id < post_id)
+            ))
+        rows = query.add_columns(search.c.rank).order_by(search.c.rank.desc(), Post.id.desc()).limit(per_page + 1).all()
+        posts = [post for post, rank in rows[:per_page]]
+        next_cursor = encode_search_cursor(rows[per_page - 1][1], posts[-1].id) if len(rows) > per_page else None
+    else:
+        cursor = decode_post_cursor(after)
+        if cursor:
+            pinned, date_posted, post_id = cursor
+            after_cursor = db.or_(
+                db.and_(Post.is_pinned == pinned, Post.date_posted < date_posted),
+                db.and_(Post.is_pinned == pinned, Post.date_posted == date_posted, Post.id < post_id)
+            )
+            if pinned:
+                after_cursor = db.or_(Post.is_pinned == False, after_cursor)
+            query = query.filter(after_cursor)
+        
+        rows = query.order_by(Post.is_pinned.desc(), Post.date_posted.desc(), Post.id.desc()).limit(per_page + 1).all()
+        posts = rows[:per_page]
+        next_cursor = encode_post_cursor(posts[-1]) if len(rows) > per_page else None
+    
+    html = render_template('forum_posts.html', posts=posts, class_level=class_level, category_id=category_id,
+                           unit_id=unit_id, search_query=search_query, next_cursor=next_cursor)
+    return {'html': html, 'post_ids': [post.id for post in posts]}
+
+@app.route('/forum')
+@login_required
+def forum():
+    class_level = request.args.get('class_level', current_user.class_level)
+    category_id = request.args.get('category_id', type=int)
+    unit_id = request.args.get('unit_id', type=int)
+    search_query = request.args.get('q', '')
     
-    posts = query.order_by(Post.is_pinned.desc(), Post.date_posted.desc()).all()
+    after = request.args.get('after')
     
-    categories = Category.query.all()
-    units = Unit.query.all()
+    # Konu listesi ve istatistikler filtre parametrelerine göre parça önbelleğinden gelir;
+    # istatistikler imleçten bağımsızdır, sonraki sayfalar ilk sayfanın kaydını kullanır
+    filters = [class_level, category_id, unit_id, search_query]
+    stats = fragment_cache.get_or_render('forum', json.dumps(['stats'] + filters), lambda: count_forum_posts(*filters))
+    fragment = fragment_cache.get_or_render('forum', json.dumps(filters + [after]), lambda: render_forum_posts(*filters, after))
     
-    return render_template('forum.html', posts=posts, categories=categories, units=units, 
-                          class_level=class_level, category_id=category_id, unit_id=unit_id)
+    prefetch_likes(post_ids=fragment['post_ids'])
+    liked_post_ids = [post_id for post_id in fragment['post_ids'] if is_liked('post', post_id)]
+    taxonomy = get_taxonomy()
+    
+    return render_template('forum.html', fragment=fragment, stats=stats, liked_post_ids=liked_post_ids,
+                          categories=taxonomy['categories'], units=taxonomy['units'], 
+                          class_level=class_level, category_id=category_id, unit_id=unit_id,
+                          search_query=search_query)
 
 @app.route('/create_post', methods=['GET', 'POST'])
 @login_required
 def create_post():
-    if current_user.is_banned:
-        flash('Hesabınız banlanmış! Konu açamazsınız.', 'danger')
-        return redirect(url_for('logout'))
-        
     if request.method == 'POST':
         title = request.form['title']
         content = request.form['content']
         category_id = request.form['category_id']
         unit_id = request.form['unit_id']
         
-        image_filename = None
-        if 'image' in request.files:
-            file = request.files['image']
-            if file and file.filename != '' and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                image_filename = get_random_filename(filename)
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], image_filename))
+        image_filename = store_upload(request.files.get('image'))
         
         post = Post(
             title=title, 
@@ -282,53 +1949,58 @@ def create_post():
             image=image_filename
         )
         db.session.add(post)
+        db.session.flush()
+        index_posts([post])
         db.session.commit()
+        fragment_cache.invalidate('forum')
+        invalidate_user(current_user.id)
+        schedule_image_variant(Post, post.id, 'image', 'image_medium', image_filename, 'medium')
         
         flash('Konunuz başarıyla oluşturuldu!', 'success')
         return redirect(url_for('view_post', post_id=post.id))
     
-    categories = Category.query.filter(
-        (Category.class_level == current_user.class_level) | 
-        (Category.class_level == 'Genel')
-    ).all()
-    
-    units = Unit.query.join(Category).filter(
-        (Category.class_level == current_user.class_level) | 
-        (Category.class_level == 'Genel')
-    ).all()
+    categories, units = taxonomy_for_levels(current_user.class_level, 'Genel')
     
     return render_template('create_post.html', categories=categories, units=units)
 
 @app.route('/post/<int:post_id>')
 @login_required
 def view_post(post_id):
-    if current_user.is_banned:
-        flash('Hesabınız banlanmış! Konuları görüntüleyemezsiniz.', 'danger')
-        return redirect(url_for('logout'))
-        
-    post = Post.query.get_or_404(post_id)
+    post = Post.query.options(
+        db.joinedload(Post.author),
+        db.joinedload(Post.category),
+        db.joinedload(Post.unit)
+    ).filter(Post.id == post_id).first_or_404()
     if post.author.is_banned:
         flash('Bu konunun yazarı banlanmış!', 'warning')
         return redirect(url_for('forum'))
-        
-    return render_template('post.html', post=post)
+    
+    # Yorumlar sayfa sayfa, yazarlarıyla birlikte tek sorguda gelir; çözüm ilk sayfada en üstte
+    per_page = app.config['COMMENTS_PER_PAGE']
+    query = Comment.query.join(Comment.author).options(db.contains_eager(Comment.author)).filter(Comment.post_id == post.id)
+    
+    cursor = decode_comment_cursor(request.args.get('after'))
+    if cursor:
+        date_posted, comment_id = cursor
+        query = query.filter(Comment.is_solution == False, db.or_(
+            Comment.date_posted > date_posted,
+            db.and_(Comment.date_posted == date_posted, Comment.id > comment_id)
+        ))
+    
+    rows = query.order_by(Comment.is_solution.desc(), Comment.date_posted, Comment.id).limit(per_page + 1).all()
+    comments = rows[:per_page]
+    next_cursor = encode_comment_cursor(comments[-1]) if len(rows) > per_page else None
+    
+    prefetch_likes(post_ids=[post.id], comment_ids=[comment.id for comment in comments])
+    
+    return render_template('post.html', post=post, comments=comments, next_cursor=next_cursor, first_page=not cursor)
 
 @app.route('/add_comment/<int:post_id>', methods=['POST'])
 @login_required
 def add_comment(post_id):
-    if current_user.is_banned:
-        flash('Hesabınız banlanmış! Yorum yapamazsınız.', 'danger')
-        return redirect(url_for('logout'))
-        
     content = request.form['content']
     
-    image_filename = None
-    if 'image' in request.files:
-        file = request.files['image']
-        if file and file.filename != '' and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            image_filename = get_random_filename(filename)
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], image_filename))
+    image_filename = store_upload(request.files.get('image'))
     
     comment = Comment(
         content=content, 
@@ -337,6 +2009,8 @@ def add_comment(post_id):
         image=image_filename
     )
     db.session.add(comment)
+    bump_counter(Post, post_id, Post.comment_count, 1)
+    bump_counter(User, current_user.id, User.comment_count, 1)
     
     post = Post.query.get(post_id)
     if post.author.id != current_user.id:
@@ -348,6 +2022,9 @@ def add_comment(post_id):
         db.session.add(notification)
     
     db.session.commit()
+    fragment_cache.invalidate('forum')
+    invalidate_user(current_user.id)
+    schedule_image_variant(Comment, comment.id, 'image', 'image_medium', image_filename, 'medium')
     
     flash('Yorumunuz eklendi!', 'success')
     return redirect(url_for('view_post', post_id=post_id))
@@ -355,10 +2032,6 @@ def add_comment(post_id):
 @app.route('/mark_solution/<int:comment_id>')
 @login_required
 def mark_solution(comment_id):
-    if current_user.is_banned:
-        flash('Hesabınız banlanmış! İşlem yapamazsınız.', 'danger')
-        return redirect(url_for('logout'))
-        
     comment = Comment.query.get_or_404(comment_id)
     post = Post.query.get_or_404(comment.post_id)
     
@@ -366,14 +2039,16 @@ def mark_solution(comment_id):
         flash('Sadece konu sahibi çözüm işaretleyebilir.', 'danger')
         return redirect(url_for('view_post', post_id=post.id))
     
-    for c in post.comments:
-        c.is_solution = False
+    Comment.query.filter(Comment.post_id == post.id, Comment.is_solution == True).update({Comment.is_solution: False})
     
     comment.is_solution = True
     post.is_solved = True
     
-    comment.author.solution_count += 1
-    update_rank(comment.author)
+    # Sayaç SQL'de artırılır; oturumdaki yazar başka bir işçide bayatlamış önbellek kopyası olabilir
+    db.session.execute(db.update(User).where(User.id == comment.user_id).values(
+        solution_count=db.func.coalesce(User.solution_count, 0) + 1), execution_options={'synchronize_session': False})
+    author = db.session.get(User, comment.user_id, populate_existing=True)
+    update_rank(author)
     
     notification = Notification(
         user_id=comment.author.id,
@@ -383,103 +2058,134 @@ def mark_solution(comment_id):
     db.session.add(notification)
     
     db.session.commit()
+    invalidate_leaderboard()
+    invalidate_user(comment.user_id)
+    fragment_cache.invalidate('forum')
     
     flash('Çözüm olarak işaretlendi!', 'success')
     return redirect(url_for('view_post', post_id=post.id))
 
+def apply_like_operations(operations):
+    items = {}
+    for item_type in LIKE_TARGETS:
+        ids = {item_id for op_type, item_id, action in operations if op_type == item_type}
+        if ids:
+            model = Post if item_type == 'post' else Comment
+            items.update(((item_type, item.id), item) for item in model.query.filter(model.id.in_(ids)))
+    
+    results = []
+    changes = []
+    for item_type, item_id, action in operations:
+        item = items.get((item_type, item_id))
+        if item is None:
+            results.append({'success': False, 'type': item_type, 'id': item_id, 'message': 'Bulunamadı'})
+            continue
+        liked, like_count, changed = toggle_like(current_user.id, item_type, item_id, action)
+        results.append({'success': True, 'type': item_type, 'id': item_id, 'liked': liked, 'like_count': like_count})
+        if changed:
+            link = f"/post/{item.post_id if item_type == 'comment' else item.id}"
+            changes.append((item_type, item_id, item.user_id, link, liked))
+    
+    if changes:
+        version = bump_like_version(current_user.id)
+    db.session.commit()
+    
+    if changes:
+        remember_likes(current_user.id, version, [(item_type, item_id, liked) for item_type, item_id, recipient_id, link, liked in changes])
+    for item_type, item_id, recipient_id, link, liked in changes:
+        if recipient_id != current_user.id:
+            if liked:
+                like_notifications.add(recipient_id, (item_type, item_id), link, current_user.username)
+            else:
+                like_notifications.discard(recipient_id, (item_type, item_id), current_user.username)
+    
+    return results
+
 @app.route('/like/<string:item_type>/<int:item_id>')
 @login_required
 def like_item(item_type, item_id):
-    if current_user.is_banned:
-        return jsonify({'success': False, 'message': 'Hesabınız banlanmış!'})
-        
-    if item_type == 'post':
-        item = Post.query.get_or_404(item_id)
-        existing_like = Like.query.filter_by(user_id=current_user.id, post_id=item_id).first()
-    elif item_type == 'comment':
-        item = Comment.query.get_or_404(item_id)
-        existing_like = Like.query.filter_by(user_id=current_user.id, comment_id=item_id).first()
-    else:
+    if item_type not in LIKE_TARGETS:
         return jsonify({'success': False, 'message': 'Geçersiz tip'})
     
-    if existing_like:
-        db.session.delete(existing_like)
-        liked = False
-    else:
-        new_like = Like(user_id=current_user.id)
-        if item_type == 'post':
-            new_like.post_id = item_id
-        else:
-            new_like.comment_id = item_id
-        db.session.add(new_like)
-        liked = True
-        
-        if item.author.id != current_user.id:
-            notification = Notification(
-                user_id=item.author.id,
-                message=f"{current_user.username} içeriğinizi beğendi!",
-                link=f"/post/{item.post_id if item_type == 'comment' else item.id}"
-            )
-            db.session.add(notification)
-    
-    db.session.commit()
-    
-    like_count = len(item.likes)
+    result = apply_like_operations([(item_type, item_id, 'toggle')])[0]
+    if not result['success']:
+        abort(404)
     
     return jsonify({
         'success': True, 
-        'liked': liked, 
-        'like_count': like_count
+        'liked': result['liked'], 
+        'like_count': result['like_count']
     })
 
+# Birden fazla beğen/beğenme işlemi tek istekte: {"operations": [{"type": "post", "id": 1, "action": "like"}]}
+@app.route('/like/batch', methods=['POST'])
+@login_required
+def like_batch():
+    payload = request.get_json(silent=True) or {}
+    requested = payload.get('operations', [])
+    if not isinstance(requested, list):
+        return jsonify({'success': False, 'message': 'Geçersiz istek'}), 400
+    limit = app.config['LIKE_BATCH_LIMIT']
+    if len(requested) > limit:
+        return jsonify({'success': False, 'message': f'En fazla {limit} işlem gönderilebilir'}), 400
+    
+    operations = []
+    for op in requested:
+        try:
+            item_type, item_id, action = op['type'], int(op['id']), op.get('action', 'toggle')
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'Geçersiz istek'}), 400
+        if item_type not in LIKE_TARGETS or action not in ('like', 'unlike', 'toggle'):
+            return jsonify({'success': False, 'message': 'Geçersiz tip'}), 400
+        operations.append((item_type, item_id, action))
+    
+    return jsonify({'success': True, 'results': apply_like_operations(operations)})
+
 @app.route('/profile/<username>')
 @login_required
 def profile(username):
-    if current_user.is_banned:
-        flash('Hesabınız banlanmış! Profilleri görüntüleyemezsiniz.', 'danger')
-        return redirect(url_for('logout'))
-        
     user = User.query.filter_by(username=username).first_or_404()
     if user.is_banned:
         flash('Bu kullanıcı banlanmış!', 'warning')
         return redirect(url_for('forum'))
         
-    posts = Post.query.filter_by(user_id=user.id).order_by(Post.date_posted.desc()).limit(10).all()
-    comments = Comment.query.filter_by(user_id=user.id).order_by(Comment.date_posted.desc()).limit(10).all()
+    def render_header():
+        # Kendi profilinde user oturumdaki önbellek kopyasıdır; ortak parçaya taze satır yazılır
+        db.session.refresh(user)
+        return render_template('profile_header.html', user=user, post_count=Post.query.filter_by(user_id=user.id).count())
     
-    return render_template('profile.html', user=user, posts=posts, comments=comments)
+    header = fragment_cache.get_or_render(f'profile:{user.id}', 'header', render_header)
+    posts = Post.query.options(db.joinedload(Post.category), db.joinedload(Post.unit)).filter_by(
+        user_id=user.id).order_by(Post.date_posted.desc()).limit(10).all()
+    comments = Comment.query.options(db.joinedload(Comment.post)).filter_by(
+        user_id=user.id).order_by(Comment.date_posted.desc()).limit(10).all()
+    
+    return render_template('profile.html', user=user, header=header, posts=posts, comments=comments)
 
 @app.route('/update_profile', methods=['POST'])
 @login_required
 def update_profile():
-    if current_user.is_banned:
-        flash('Hesabınız banlanmış! Profil düzenleyemezsiniz.', 'danger')
-        return redirect(url_for('logout'))
-        
     if request.method == 'POST':
+        # Şifre özeti yükleme yapılmadan önce hesaplanır; sunucu yoğunsa hiçbir şey değişmez
+        new_password = request.form.get('new_password')
+        password = hash_password(new_password) if new_password else None
+        
         # Profil fotoğrafı yükleme
-        if 'profile_picture' in request.files:
-            file = request.files['profile_picture']
-            if file and file.filename != '' and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                profile_filename = get_random_filename(filename)
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], profile_filename))
-                
-                # Eski fotoğrafı sil
-                if current_user.profile_picture:
-                    try:
-                        os.remove(os.path.join(app.config['UPLOAD_FOLDER'], current_user.profile_picture))
-                    except:
-                        pass
-                
-                current_user.profile_picture = profile_filename
+        profile_filename = store_upload(request.files.get('profile_picture'))
+        if profile_filename:
+            # Eski fotoğrafı bırak
+            release_upload(current_user.profile_picture, current_user.profile_picture_thumb)
+            
+            current_user.profile_picture = profile_filename
+            current_user.profile_picture_thumb = None
         
         # Şifre değiştirme
-        new_password = request.form.get('new_password')
-        if new_password:
-            current_user.password = generate_password_hash(new_password)
+        if password:
+            current_user.password = password
         
         db.session.commit()
+        invalidate_user(current_user.id)
+        schedule_image_variant(User, current_user.id, 'profile_picture', 'profile_picture_thumb', profile_filename, 'thumb')
         flash('Profil başarıyla güncellendi!', 'success')
     
     return redirect(url_for('profile', username=current_user.username))
@@ -487,34 +2193,125 @@ def update_profile():
 @app.route('/notifications')
 @login_required
 def get_notifications():
-    if current_user.is_banned:
-        return jsonify([])
-        
-    notifications = Notification.query.filter_by(user_id=current_user.id, seen=False).order_by(Notification.date_created.desc()).all()
+    # Son bildirim kimliği hem ETag hem de since imleci olarak kullanılır
+    latest_id = db.session.execute(
+        db.select(db.func.max(Notification.id)).where(Notification.user_id == current_user.id)
+    ).scalar() or 0
+    etag = f'n{latest_id}'
+    since = request.args.get('since', type=int)
     
-    notif_list = [{
-        "id": n.id, 
-        "message": n.message, 
-        "link": n.link,
-        "date_created": n.date_created.strftime('%d.%m.%Y %H:%M')
-    } for n in notifications]
+    if request.if_none_match.contains(etag) or (since is not None and latest_id <= since):
+        response = Response(status=304)
+    else:
+        query = Notification.query.filter_by(user_id=current_user.id, seen=False)
+        if since is not None:
+            query = query.filter(Notification.id > since)
+        notifications = query.order_by(Notification.date_created.desc()).all()
+        
+        notif_list = [notification_to_dict(n) for n in notifications]
+        
+        if notifications:
+            Notification.query.filter(Notification.id.in_([n.id for n in notifications])).update(
+                {Notification.seen: True}, synchronize_session=False)
+            db.session.commit()
+        
+        response = jsonify(notif_list)
     
-    for n in notifications:
-        n.seen = True
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.headers['X-Notification-Cursor'] = str(latest_id)
+    return response
+
+@app.route('/notifications/stream')
+@login_required
+def notification_stream():
+    user_id = current_user.id
+    since = request.args.get('since', type=int)
+    subscription = notification_bus.subscribe(user_id)
+    timeout = app.config['NOTIFICATION_STREAM_TIMEOUT']
+    # Abone olduktan sonra imleçten yeni bildirim aranır; iki uzun sorgu arasında gelen kaybolmaz
+    pending = since is not None and db.session.execute(db.select(Notification.id).where(
+        Notification.user_id == user_id, Notification.seen == False, Notification.id > since).limit(1)).scalar()
     
-    db.session.commit()
+    def events():
+        # Uzun sorgu: ilk olayda ya da süre dolunca kapanır. gthread işçisinde bir iş parçacığını
+        # tutacağından sayfalar akışı yalnızca NOTIFICATION_STREAM_URL ile ayrı gevent sunucusunda kullanır.
+        try:
+            yield 'retry: 5000\n\n'
+            if pending:
+                yield f"data: {json.dumps({'id': pending})}\n\n"
+                return
+            try:
+                payload = subscription.get(timeout=timeout)
+                yield f"data: {json.dumps(payload)}\n\n"
+            except queue.Empty:
+                yield ': timeout\n\n'
+        finally:
+            notification_bus.unsubscribe(user_id, subscription)
     
-    return jsonify(notif_list)
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/leaderboard')
 @login_required
 def leaderboard():
-    if current_user.is_banned:
-        flash('Hesabınız banlanmış! Liderlik tablosunu görüntüleyemezsiniz.', 'danger')
-        return redirect(url_for('logout'))
-        
-    users = User.query.filter_by(is_banned=False).order_by(User.solution_count.desc()).all()
-    return render_template('leaderboard.html', users=users)
+    class_level = request.args.get('class_level')
+    if class_level == 'Hepsi':
+        class_level = None
+    page = max(request.args.get('page', 1, type=int), 1)
+    
+    def render_table():
+        entries, has_next = leaderboard_page(class_level, page)
+        return render_template('leaderboard_table.html', users=entries, page=page, has_next=has_next, class_level=class_level)
+    
+    table = fragment_cache.get_or_render('leaderboard', json.dumps([class_level, page]), render_table)
+    # Kullanıcının sırası da aynı etikettedir; çözüm işaretleme ve ban/unban etiketi geçersiz kılar
+    my_position = fragment_cache.get_or_render('leaderboard', json.dumps(['position', class_level, current_user.id]),
+                                               lambda: leaderboard_position(current_user, class_level))
+    
+    return render_template('leaderboard.html', table=table, class_level=class_level, my_position=my_position)
+
+# Yönetim tabloları: sunucu tarafında sayfalanır, sıralanır ve süzülür
+def admin_users_query(search, status):
+    post_count = db.select(db.func.count(Post.id)).where(Post.user_id == User.id).scalar_subquery().label('post_count')
+    query = db.session.query(User, post_count)
+    if search:
+        query = query.filter(User.username.ilike(f'%{search}%'))
+    if status == 'banned':
+        query = query.filter(User.is_banned == True)
+    elif status == 'active':
+        query = query.filter(User.is_banned == False)
+    sorts = {'id': User.id, 'username': User.username, 'class_level': User.class_level,
+             'solutions': User.solution_count, 'comments': User.comment_count, 'posts': post_count}
+    return query, sorts
+
+def admin_posts_query(search, status):
+    query = Post.query.join(Post.author).options(
+        db.contains_eager(Post.author),
+        db.joinedload(Post.category)
+    )
+    if search:
+        query = query.filter(Post.title.ilike(f'%{search}%'))
+    if status == 'solved':
+        query = query.filter(Post.is_solved == True)
+    elif status == 'unsolved':
+        query = query.filter(Post.is_solved == False)
+    elif status == 'pinned':
+        query = query.filter(Post.is_pinned == True)
+    sorts = {'id': Post.id, 'title': Post.title, 'author': User.username, 'date': Post.date_posted,
+             'likes': Post.like_count, 'comments': Post.comment_count}
+    return query, sorts
+
+def admin_categories_query(search, status):
+    query = Category.query.options(db.selectinload(Category.units))
+    if search:
+        query = query.filter(Category.name.ilike(f'%{search}%'))
+    if status:
+        query = query.filter(Category.class_level == status)
+    sorts = {'id': Category.id, 'name': Category.name, 'class_level': Category.class_level}
+    return query, sorts
+
+ADMIN_TABLES = {'users': admin_users_query, 'posts': admin_posts_query, 'categories': admin_categories_query}
 
 @app.route('/admin')
 @login_required
@@ -523,11 +2320,160 @@ def admin_panel():
         flash('Admin erişiminiz yok!', 'danger')
         return redirect(url_for('forum'))
     
-    users = User.query.all()
-    posts = Post.query.all()
-    categories = Category.query.all()
+    tab = request.args.get('tab', 'users')
+    if tab not in ADMIN_TABLES:
+        tab = 'users'
+    search = request.args.get('q', '')
+    status = request.args.get('status', '')
+    sort = request.args.get('sort', 'id')
+    direction = 'asc' if request.args.get('dir') == 'asc' else 'desc'
+    page = max(request.args.get('page', 1, type=int), 1)
+    
+    query, sorts = ADMIN_TABLES[tab](search, status)
+    if sort not in sorts:
+        sort = 'id'
+    order = sorts[sort].asc() if direction == 'asc' else sorts[sort].desc()
+    pagination = query.order_by(order, sorts['id']).paginate(page=page, per_page=app.config['ADMIN_PAGE_SIZE'], error_out=False)
+    
+    unit_post_counts = {}
+    if tab == 'categories':
+        unit_ids = [unit.id for category in pagination.items for unit in category.units]
+        if unit_ids:
+            unit_post_counts = dict(db.session.query(Post.unit_id, db.func.count(Post.id)).filter(
+                Post.unit_id.in_(unit_ids)).group_by(Post.unit_id).all())
+    
+    return render_template('admin.html', tab=tab, pagination=pagination, search=search, status=status,
+                           sort=sort, direction=direction, unit_post_counts=unit_post_counts)
+
+@app.route('/admin/bulk_users', methods=['POST'])
+@login_required
+def bulk_users():
+    if not current_user.is_admin:
+        flash('Admin erişiminiz yok!', 'danger')
+        return redirect(url_for('forum'))
+    
+    user_ids = request.form.getlist('user_ids', type=int)
+    action = request.form.get('action')
+    if not user_ids or action not in ('ban', 'unban', 'purge'):
+        flash('Kullanıcı ve işlem seçin!', 'warning')
+        return redirect(request.referrer or url_for('admin_panel'))
+    
+    ban_reason = request.form.get('ban_reason', '')
+    changed = set_users_banned(user_ids, action != 'unban', ban_reason)
+    if action == 'purge':
+        # Banlanan kullanıcının içeriği hemen gizlenir, silme arka planda parça parça yapılır
+        enqueue_purge('user', changed)
+    db.session.commit()
+    invalidate_moderated(changed)
+    schedule_purge()
+    
+    if action == 'purge':
+        flash(f'{len(changed)} kullanıcı banlandı, içerikleri silme kuyruğuna alındı!', 'success')
+    elif action == 'ban':
+        flash(f'{len(changed)} kullanıcı banlandı!', 'success')
+    else:
+        flash(f'{len(changed)} kullanıcının banı kaldırıldı!', 'success')
+    return redirect(request.referrer or url_for('admin_panel'))
+
+@app.route('/admin/bulk_posts', methods=['POST'])
+@login_required
+def bulk_posts():
+    if not current_user.is_admin:
+        flash('Admin erişiminiz yok!', 'danger')
+        return redirect(url_for('forum'))
+    
+    post_ids = request.form.getlist('post_ids', type=int)
+    action = request.form.get('action')
+    if not post_ids or action not in ('delete', 'pin', 'unpin'):
+        flash('Konu ve işlem seçin!', 'warning')
+        return redirect(request.referrer or url_for('admin_panel', tab='posts'))
+    
+    if action == 'delete':
+        enqueue_purge('post', post_ids)
+        db.session.commit()
+        schedule_purge()
+        flash(f'{len(post_ids)} konu silme kuyruğuna alındı!', 'success')
+    else:
+        Post.query.filter(Post.id.in_(post_ids)).update({Post.is_pinned: action == 'pin'}, synchronize_session=False)
+        db.session.commit()
+        flash(f'{len(post_ids)} konu güncellendi!', 'success')
+    fragment_cache.invalidate('forum')
+    
+    return redirect(request.referrer or url_for('admin_panel', tab='posts'))
+
+@app.route('/admin/cache_stats')
+@login_required
+def cache_stats():
+    if not current_user.is_admin:
+        abort(403)
+    return jsonify(dict(fragment_cache.stats, entries=len(fragment_cache.entries), shared=fragment_cache.shared is not None))
+
+def prometheus_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# Prometheus metin biçimi; METRICS_TOKEN tanımlıysa Bearer belirteci, değilse yönetici oturumu gerekir
+@app.route('/metrics')
+def metrics():
+    token = app.config['METRICS_TOKEN']
+    if token:
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            abort(403)
+    elif not (current_user.is_authenticated and current_user.is_admin):
+        abort(403)
+    
+    with metrics_lock:
+        snapshot = {endpoint: dict(values, buckets=list(values['buckets']), lazy_loads=Counter(values['lazy_loads']))
+                    for endpoint, values in request_metrics.items()}
+    
+    counters = [
+        ('beyinmatik_requests_total', 'İstek sayısı', 'requests'),
+        ('beyinmatik_request_errors_total', '5xx yanıt sayısı', 'errors'),
+        ('beyinmatik_sql_queries_total', 'Çalıştırılan SQL ifadesi sayısı', 'queries'),
+        ('beyinmatik_sql_seconds_total', 'SQL ifadelerinde geçen süre', 'query_seconds'),
+        ('beyinmatik_render_seconds_total', 'Şablon render süresi (şablondaki tembel yüklemeler dahil)', 'render_seconds'),
+        ('beyinmatik_upload_io_seconds_total', 'Yükleme dosyası G/Ç süresi', 'upload_io_seconds'),
+    ]
+    lines = []
+    for name, help_text, field in counters:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        lines += [f'{name}{{endpoint="{prometheus_label(endpoint)}"}} {values[field]}' for endpoint, values in sorted(snapshot.items())]
     
-    return render_template('admin.html', users=users, posts=posts, categories=categories)
+    lines += ['# HELP beyinmatik_request_duration_seconds İstek süresi', '# TYPE beyinmatik_request_duration_seconds histogram']
+    for endpoint, values in sorted(snapshot.items()):
+        label = prometheus_label(endpoint)
+        for bound, count in zip(REQUEST_DURATION_BUCKETS, values['buckets']):
+            lines.append(f'beyinmatik_request_duration_seconds_bucket{{endpoint="{label}",le="{bound}"}} {count}')
+        lines.append(f'beyinmatik_request_duration_seconds_bucket{{endpoint="{label}",le="+Inf"}} {values["requests"]}')
+        lines.append(f'beyinmatik_request_duration_seconds_sum{{endpoint="{label}"}} {values["seconds"]}')
+        lines.append(f'beyinmatik_request_duration_seconds_count{{endpoint="{label}"}} {values["requests"]}')
+    
+    lines += ['# HELP beyinmatik_lazy_loads_total SQL çalıştıran tembel ilişki yüklemeleri', '# TYPE beyinmatik_lazy_loads_total counter']
+    for endpoint, values in sorted(snapshot.items()):
+        for origin, count in sorted(values['lazy_loads'].items()):
+            lines.append(f'beyinmatik_lazy_loads_total{{endpoint="{prometheus_label(endpoint)}",origin="{prometheus_label(origin)}"}} {count}')
+    
+    lines += ['# HELP beyinmatik_fragment_cache_total Parça önbelleği olayları', '# TYPE beyinmatik_fragment_cache_total counter']
+    lines += [f'beyinmatik_fragment_cache_total{{result="{result}"}} {count}' for result, count in fragment_cache.stats.items()]
+    
+    with password_hash_lock:
+        hash_stats = {operation: list(password_hash_stats[operation]) for operation in ('hash', 'check')}
+        hash_pending, hash_rejected = password_hash_state['pending'], password_hash_stats['rejected']
+    lines += ['# HELP beyinmatik_password_hash_seconds Şifre özeti süresi (kuyrukta bekleme dahil)',
+              '# TYPE beyinmatik_password_hash_seconds summary']
+    for operation, (count, seconds) in hash_stats.items():
+        lines.append(f'beyinmatik_password_hash_seconds_sum{{operation="{operation}"}} {seconds}')
+        lines.append(f'beyinmatik_password_hash_seconds_count{{operation="{operation}"}} {count}')
+    lines += ['# HELP beyinmatik_password_hash_queue_depth Bekleyen ve çalışan şifre özeti işleri',
+              '# TYPE beyinmatik_password_hash_queue_depth gauge', f'beyinmatik_password_hash_queue_depth {hash_pending}',
+              '# HELP beyinmatik_password_hash_rejected_total Kuyruk dolu ya da süre aşımı nedeniyle reddedilenler',
+              '# TYPE beyinmatik_password_hash_rejected_total counter', f'beyinmatik_password_hash_rejected_total {hash_rejected}']
+    
+    with metrics_lock:
+        rejections = sorted(rate_limit_rejections.items())
+    lines += ['# HELP beyinmatik_rate_limited_total Hız sınırına takılan istekler', '# TYPE beyinmatik_rate_limited_total counter']
+    lines += [f'beyinmatik_rate_limited_total{{endpoint="{prometheus_label(endpoint)}"}} {count}' for endpoint, count in rejections]
+    
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
 
 @app.route('/ban_user/<int:user_id>', methods=['GET', 'POST'])
 @login_required
@@ -540,9 +2486,11 @@ def ban_user(user_id):
     
     if request.method == 'POST':
         ban_reason = request.form.get('ban_reason', '')
-        user.is_banned = True
-        user.ban_reason = ban_reason
+        if not set_users_banned([user.id], True, ban_reason):
+            flash('Yönetici hesapları banlanamaz!', 'danger')
+            return redirect(url_for('admin_panel'))
         db.session.commit()
+        invalidate_moderated([user.id])
         
         flash(f'{user.username} kullanıcısı banlandı! Sebep: {ban_reason}', 'success')
         return redirect(url_for('admin_panel'))
@@ -557,9 +2505,11 @@ def unban_user(user_id):
         return redirect(url_for('forum'))
     
     user = User.query.get_or_404(user_id)
-    user.is_banned = False
-    user.ban_reason = None
+    if not set_users_banned([user.id], False):
+        flash('Yönetici hesaplarının ban durumu değiştirilemez!', 'danger')
+        return redirect(url_for('admin_panel'))
     db.session.commit()
+    invalidate_moderated([user.id])
     
     flash(f'{user.username} kullanıcısının banı kaldırıldı!', 'success')
     return redirect(url_for('admin_panel'))
@@ -574,6 +2524,7 @@ def pin_post(post_id):
     post = Post.query.get_or_404(post_id)
     post.is_pinned = True
     db.session.commit()
+    fragment_cache.invalidate('forum')
     
     flash('Konu sabitlendi!', 'success')
     return redirect(url_for('view_post', post_id=post_id))
@@ -588,6 +2539,7 @@ def unpin_post(post_id):
     post = Post.query.get_or_404(post_id)
     post.is_pinned = False
     db.session.commit()
+    fragment_cache.invalidate('forum')
     
     flash('Konu sabitlenmekten çıkarıldı!', 'success')
     return redirect(url_for('view_post', post_id=post_id))
@@ -598,17 +2550,11 @@ def delete_post(post_id):
     post = Post.query.get_or_404(post_id)
     
     if current_user.is_admin or post.author.id == current_user.id:
-        Comment.query.filter_by(post_id=post_id).delete()
-        Like.query.filter_by(post_id=post_id).delete()
-        
-        if post.image:
-            try:
-                os.remove(os.path.join(app.config['UPLOAD_FOLDER'], post.image))
-            except:
-                pass
-        
-        db.session.delete(post)
+        affected = delete_posts([post_id])
         db.session.commit()
+        fragment_cache.invalidate('forum')
+        for user_id in affected:
+            invalidate_user(user_id)
         
         flash('Konu başarıyla silindi!', 'success')
     else:
@@ -623,16 +2569,19 @@ def delete_comment(comment_id):
     post_id = comment.post_id
     
     if current_user.is_admin or comment.author.id == current_user.id:
+        author_id = comment.user_id
         Like.query.filter_by(comment_id=comment_id).delete()
-        
-        if comment.image:
-            try:
-                os.remove(os.path.join(app.config['UPLOAD_FOLDER'], comment.image))
-            except:
-                pass
-        
-        db.session.delete(comment)
+        # Sayaçlar ve dosya yalnızca bu isteğin gerçekten sildiği satır için düşülür; çift tıklama iki kez düşürmez
+        row = db.session.execute(db.delete(Comment).where(Comment.id == comment_id).returning(
+            Comment.user_id, Comment.post_id, Comment.image, Comment.image_medium
+        ).execution_options(synchronize_session=False)).first()
+        if row:
+            bump_counter(Post, row.post_id, Post.comment_count, -1)
+            bump_counter(User, row.user_id, User.comment_count, -1)
+            release_upload(row.image, row.image_medium)
         db.session.commit()
+        fragment_cache.invalidate('forum')
+        invalidate_user(author_id)
         
         flash('Yorum başarıyla silindi!', 'success')
     else:
@@ -643,10 +2592,6 @@ def delete_comment(comment_id):
 @app.route('/edit_post/<int:post_id>', methods=['GET', 'POST'])
 @login_required
 def edit_post(post_id):
-    if current_user.is_banned:
-        flash('Hesabınız banlanmış! Konu düzenleyemezsiniz.', 'danger')
-        return redirect(url_for('logout'))
-        
     post = Post.query.get_or_404(post_id)
     
     if not (current_user.is_admin or post.author.id == current_user.id):
@@ -659,39 +2604,29 @@ def edit_post(post_id):
         post.category_id = request.form['category_id']
         post.unit_id = request.form['unit_id']
         
-        if 'remove_image' in request.form and post.image:
-            try:
-                os.remove(os.path.join(app.config['UPLOAD_FOLDER'], post.image))
-            except:
-                pass
+        new_image = store_upload(request.files.get('image'))
+        if ('remove_image' in request.form or new_image) and post.image:
+            release_upload(post.image, post.image_medium)
             post.image = None
+            post.image_medium = None
+        if new_image:
+            post.image = new_image
         
-        if 'image' in request.files:
-            file = request.files['image']
-            if file and file.filename != '' and allowed_file(file.filename):
-                if post.image:
-                    try:
-                        os.remove(os.path.join(app.config['UPLOAD_FOLDER'], post.image))
-                    except:
-                        pass
-                
-                filename = secure_filename(file.filename)
-                post.image = get_random_filename(filename)
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], post.image))
-        
+        index_posts([post])
         db.session.commit()
+        fragment_cache.invalidate('forum')
+        schedule_image_variant(Post, post_id, 'image', 'image_medium', new_image, 'medium')
         flash('Konu başarıyla güncellendi!', 'success')
         return redirect(url_for('view_post', post_id=post_id))
     
-    categories = Category.query.all()
-    units = Unit.query.all()
+    taxonomy = get_taxonomy()
     
-    return render_template('edit_post.html', post=post, categories=categories, units=units)
+    return render_template('edit_post.html', post=post, categories=taxonomy['categories'], units=taxonomy['units'])
 
 @app.route('/get_units/<int:category_id>')
 @login_required
 def get_units(category_id):
-    units = Unit.query.filter_by(category_id=category_id).all()
+    units = get_taxonomy()['units_by_category'].get(category_id, ())
     units_list = [{'id': unit.id, 'name': unit.name} for unit in units]
     return jsonify(units_list)
 
@@ -701,15 +2636,483 @@ def logout():
     logout_user()
     return redirect(url_for('index'))
 
+# Sayaçlar kimlik aralıklarıyla, her parti kendi transaction'ında yeniden hesaplanır;
+# tek bir UPDATE tüm tabloyu commit'e kadar kilitler ve beğeni/yorum yazımlarını bekletirdi
+def recount_counters(batch_size=1000):
+    post_likes = db.select(db.func.count(Like.id)).where(Like.post_id == Post.id).scalar_subquery()
+    post_comments = db.select(db.func.count(Comment.id)).where(Comment.post_id == Post.id).scalar_subquery()
+    comment_likes = db.select(db.func.count(Like.id)).where(Like.comment_id == Comment.id).scalar_subquery()
+    user_comments = db.select(db.func.count(Comment.id)).where(Comment.user_id == User.id).scalar_subquery()
+    
+    for model, values in (
+        (Post, {'like_count': post_likes, 'comment_count': post_comments}),
+        (Comment, {'like_count': comment_likes}),
+        (User, {'comment_count': user_comments}),
+    ):
+        max_id = db.session.execute(db.select(db.func.max(model.id))).scalar() or 0
+        for start in range(0, max_id, batch_size):
+            db.session.execute(db.update(model).where(model.id > start, model.id <= start + batch_size).values(values))
+            db.session.commit()
+
+@app.cli.command('recount')
+@click.option('--batch-size', type=int, default=1000)
+def recount_command(batch_size):
+    recount_counters(batch_size)
+    print("Sayaçlar yeniden hesaplandı!")
+
+# Şema göçleri: sürüm numarasına göre sırayla ve bir kez uygulanır
+MIGRATIONS = []
+
+def migration(version, name):
+    def decorator(func):
+        MIGRATIONS.append((version, name, func))
+        return func
+    return decorator
+
+def quote_table(table):
+    return db.engine.dialect.identifier_preparer.quote(table)
+
+def add_column_online(table, column, ddl):
+    if column in [c['name'] for c in db.inspect(db.engine).get_columns(table)]:
+        return False
+    # PostgreSQL 11+ sabit varsayılanlı sütunu tabloyu yeniden yazmadan ekler
+    db.session.execute(db.text(f"ALTER TABLE {quote_table(table)} ADD COLUMN {column} {ddl}"))
+    db.session.commit()
+    return True
+
+def create_index_online(name, table, columns, unique=False):
+    # CONCURRENTLY tabloyu yazmaya kilitlemez ama transaction dışında çalışmalıdır
+    concurrently = 'CONCURRENTLY ' if db.engine.dialect.name == 'postgresql' else ''
+    statement = f"CREATE {'UNIQUE ' if unique else ''}INDEX {concurrently}IF NOT EXISTS {name} ON {quote_table(table)} ({', '.join(columns)})"
+    # Açık kalan oturum transaction'ı CONCURRENTLY'yi bekletmesin
+    db.session.commit()
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        try:
+            connection.execute(db.text(statement))
+        except Exception:
+            # Yarım kalan (INVALID) indeks bir sonraki denemede atlanmasın
+            connection.execute(db.text(f"DROP INDEX {concurrently}IF EXISTS {name}"))
+            raise
+
+@migration(1, 'Beğeni ve yorum sayaç sütunları')
+def migration_counter_columns():
+    added = [
+        add_column_online('post', 'like_count', 'INTEGER DEFAULT 0'),
+        add_column_online('post', 'comment_count', 'INTEGER DEFAULT 0'),
+        add_column_online('comment', 'like_count', 'INTEGER DEFAULT 0'),
+        add_column_online('user', 'comment_count', 'INTEGER DEFAULT 0'),
+    ]
+    if any(added):
+        recount_counters()
+
+@migration(2, 'Yabancı anahtar indeksleri ve tekil beğeniler')
+def migration_hot_indexes():
+    create_index_online('ix_post_user_id', 'post', ['user_id'])
+    create_index_online('ix_post_category_id', 'post', ['category_id'])
+    create_index_online('ix_post_unit_id', 'post', ['unit_id'])
+    create_index_online('ix_post_date_posted', 'post', ['date_posted'])
+    create_index_online('ix_post_listing', 'post', ['is_pinned', 'date_posted', 'id'])
+    create_index_online('ix_comment_post_id', 'comment', ['post_id'])
+    create_index_online('ix_comment_user_id', 'comment', ['user_id'])
+    create_index_online('ix_like_post_id', 'like', ['post_id'])
+    create_index_online('ix_like_comment_id', 'like', ['comment_id'])
+    create_index_online('ix_notification_user_seen_date', 'notification', ['user_id', 'seen', 'date_created'])
+    
+    # Tekil indeksten önce mükerrer beğenileri temizle
+    keep = db.select(db.func.min(Like.id)).group_by(Like.user_id, Like.post_id, Like.comment_id)
+    deleted = Like.query.filter(Like.id.not_in(keep)).delete(synchronize_session=False)
+    db.session.commit()
+    if deleted:
+        recount_counters()
+    
+    create_index_online('uq_like_user_post', 'like', ['user_id', 'post_id'], unique=True)
+    create_index_online('uq_like_user_comment', 'like', ['user_id', 'comment_id'], unique=True)
+
+@migration(3, 'Kategori ve ünite doğal anahtarları')
+def migration_taxonomy_keys():
+    create_index_online('uq_category_name_level', 'category', ['name', 'class_level'], unique=True)
+    create_index_online('uq_unit_category_name', 'unit', ['category_id', 'name'], unique=True)
+
+@app.cli.command('prune-notifications')
+@click.option('--days', type=int, default=None, help='Bu günden eski görülmüş bildirimleri sil')
+@click.option('--batch-size', type=int, default=1000)
+def prune_notifications_command(days, batch_size):
+    cutoff = datetime.utcnow() - timedelta(days=days or app.config['NOTIFICATION_RETENTION_DAYS'])
+    total = 0
+    while True:
+        ids = db.session.execute(
+            db.select(Notification.id).where(Notification.seen == True, Notification.date_created < cutoff).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        Notification.query.filter(Notification.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        total += len(ids)
+    
+    print(f"{total} eski bildirim silindi!")
+
+@migration(4, 'Küçültülmüş resim sütunları')
+def migration_image_variants():
+    add_column_online('user', 'profile_picture_thumb', 'VARCHAR(200)')
+    add_column_online('post', 'image_medium', 'VARCHAR(200)')
+    add_column_online('comment', 'image_medium', 'VARCHAR(200)')
+
+@app.cli.command('gc-uploads')
+@click.option('--grace-hours', type=int, default=None, help='Bu süreden kısa zamandır sahipsiz olan dosyalara dokunma')
+@click.option('--batch-size', type=int, default=500)
+@click.option('--scan', is_flag=True, help='Tabloda kaydı olmayan dosyaları da tara')
+def gc_uploads_command(grace_hours, batch_size, scan):
+    storage = upload_storage()
+    cutoff = datetime.utcnow() - timedelta(hours=app.config['UPLOAD_GC_GRACE_HOURS'] if grace_hours is None else grace_hours)
+    
+    def blob_files(key):
+        return [key] + [variant_key(key, variant) for variant in app.config['IMAGE_VARIANTS']]
+    
+    def delete_blob_files(key):
+        for name in blob_files(key):
+            storage.delete(name)
+    
+    def reused(key):
+        # save() var olan dosyanın mtime'ını tazeler; satır silinirken aynı içerik yükleniyor olabilir
+        try:
+            return storage.modified_at(key + '.gc') >= cutoff
+        except FileNotFoundError:
+            return False
+    
+    total = 0
+    while True:
+        keys = db.session.execute(
+            db.select(Blob.key).where(Blob.ref_count <= 0, Blob.updated_at < cutoff).limit(batch_size)
+        ).scalars().all()
+        if not keys:
+            break
+        # Dosyalar satır silinmeden önce kenara alınır; bu arada aynı içeriği yükleyen istek dosyayı yeniden yazar
+        for key in keys:
+            for name in blob_files(key):
+                storage.bury(name)
+        deleted = set(db.session.execute(
+            db.delete(Blob).where(Blob.key.in_(keys), Blob.ref_count <= 0).returning(Blob.key)
+        ).scalars())
+        db.session.commit()
+        for key in keys:
+            if key in deleted and not reused(key):
+                for name in blob_files(key):
+                    storage.delete(name + '.gc')
+                total += 1
+            else:
+                for name in blob_files(key):
+                    storage.unbury(name)
+    
+    if scan:
+        # Commit edilemeyen isteklerden kalan, tabloda karşılığı olmayan dosyalar
+        variant_suffixes = tuple(f"_{variant}.webp" for variant in app.config['IMAGE_VARIANTS'])
+        candidates = [key for key in storage.iter_keys()
+                      if not key.endswith(variant_suffixes) and storage.modified_at(key) < cutoff]
+        for start in range(0, len(candidates), batch_size):
+            batch = candidates[start:start + batch_size]
+            known = set(db.session.execute(db.select(Blob.key).where(Blob.key.in_(batch))).scalars())
+            for key in batch:
+                if key not in known:
+                    delete_blob_files(key)
+                    total += 1
+    
+    print(f"{total} kullanılmayan dosya silindi!")
+
+@migration(5, 'Liderlik tablosu indeksleri')
+def migration_leaderboard_indexes():
+    create_index_online('ix_user_leaderboard', 'user', ['is_banned', 'solution_count', 'id'])
+    create_index_online('ix_user_class_leaderboard', 'user', ['class_level', 'is_banned', 'solution_count', 'id'])
+
+@migration(6, 'Konu yorumları indeksi')
+def migration_comment_thread_index():
+    create_index_online('ix_comment_thread', 'comment', ['post_id', 'is_solution', 'date_posted', 'id'])
+
+CASCADE_FOREIGN_KEYS = [
+    ('post', 'user_id', 'user'),
+    ('comment', 'user_id', 'user'),
+    ('comment', 'post_id', 'post'),
+    ('like', 'user_id', 'user'),
+    ('like', 'post_id', 'post'),
+    ('like', 'comment_id', 'comment'),
+    ('notification', 'user_id', 'user'),
+]
+
+@migration(7, 'Zincirleme silme (ON DELETE CASCADE)')
+def migration_cascade_deletes():
+    # Eski silmelerden kalan yetim satırlar kısıt doğrulamasını bozmasın
+    Comment.query.filter(~db.exists().where(Post.id == Comment.post_id)).delete(synchronize_session=False)
+    Like.query.filter(Like.comment_id != None, ~db.exists().where(Comment.id == Like.comment_id)).delete(synchronize_session=False)
+    Like.query.filter(Like.post_id != None, ~db.exists().where(Post.id == Like.post_id)).delete(synchronize_session=False)
+    Notification.query.filter(~db.exists().where(User.id == Notification.user_id)).delete(synchronize_session=False)
+    db.session.commit()
+    
+    if db.engine.dialect.name != 'postgresql':
+        # SQLite kısıtları yerinde değiştiremez; eski tablolarda silmeler ORM ve temizleme işiyle zincirlenir
+        return
+    
+    inspector = db.inspect(db.engine)
+    for table, column, referred in CASCADE_FOREIGN_KEYS:
+        for foreign_key in inspector.get_foreign_keys(table):
+            if foreign_key['constrained_columns'] != [column] or foreign_key['options'].get('ondelete', '').upper() == 'CASCADE':
+                continue
+            name = foreign_key['name']
+            # NOT VALID ile eklenen kısıt tabloyu taramadan gelir, doğrulama ayrı ve kilitsiz yapılır
+            db.session.execute(db.text(f"ALTER TABLE {quote_table(table)} DROP CONSTRAINT {name}"))
+            db.session.execute(db.text(
+                f"ALTER TABLE {quote_table(table)} ADD CONSTRAINT {name} FOREIGN KEY ({column}) "
+                f"REFERENCES {quote_table(referred)} (id) ON DELETE CASCADE NOT VALID"))
+            db.session.commit()
+            db.session.execute(db.text(f"ALTER TABLE {quote_table(table)} VALIDATE CONSTRAINT {name}"))
+            db.session.commit()
+
+@migration(8, 'Beğeni sürümü sütunu')
+def migration_like_version():
+    add_column_online('user', 'like_version', 'INTEGER DEFAULT 0')
+
+@migration(9, 'Bildirim bağlantısı indeksi')
+def migration_notification_link_index():
+    # Konu silinirken bildirimleri bağlantıdan bulunur, tablo taranmaz
+    create_index_online('ix_notification_link', 'notification', ['link'])
+
+@migration(10, 'Tam metin arama dizini')
+def migration_search_index():
+    # FTS5/tsvector etkinken ILIKE'a düşülmez; eski konular dizine girmeden arama onları bulamaz
+    init_search_index()
+    reindex_posts()
+
+@app.cli.command('purge')
+@click.option('--batch-size', type=int, default=None)
+def purge_command(batch_size):
+    total = run_purge_jobs(batch_size)
+    print(f"{total} silme işi tamamlandı!")
+
+def run_migrations():
+    applied = set(db.session.execute(db.select(SchemaMigration.version)).scalars())
+    for version, name, upgrade in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version in applied:
+            continue
+        upgrade()
+        db.session.add(SchemaMigration(version=version, name=name))
+        db.session.commit()
+        print(f"Göç uygulandı: {version} - {name}")
+
+@app.cli.command('migrate')
+def migrate_command():
+    db.create_all()
+    run_migrations()
+
+@app.cli.command('reindex-search')
+def reindex_search_command():
+    init_search_index()
+    reindex_posts()
+    print("Arama dizini yeniden oluşturuldu!")
+
+# İçerik taşıma/yedekleme: her satırı bir kayıt olan NDJSON akışı ({"type": "post", sütunlar...}).
+# Dışa aktarım sunucu taraflı imleçle okur, içe aktarım toplu executemany ile yazar; bellek kullanımı sabittir.
+# Yüklenen dosyalar akışa girmez, UPLOAD_FOLDER ayrıca kopyalanmalıdır.
+CONTENT_EXPORT_VERSION = 1
+CONTENT_MODELS = {'category': Category, 'unit': Unit, 'blob': Blob, 'user': User, 'post': Post, 'comment': Comment, 'like': Like}
+
+def export_rows(model, batch_size):
+    statement = db.select(*model.__table__.columns).order_by(*model.__table__.primary_key.columns)
+    if model is Blob:
+        statement = statement.where(Blob.ref_count > 0)
+    result = db.session.execute(statement.execution_options(stream_results=True, max_row_buffer=batch_size))
+    for partition in result.mappings().partitions(batch_size):
+        yield from partition
+
+@app.cli.command('export-content')
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='Varsayılan: standart çıktı')
+@click.option('--batch-size', type=int, default=1000)
+def export_content_command(output, batch_size):
+    output.write(json.dumps({'type': 'header', 'version': CONTENT_EXPORT_VERSION,
+                             'exported_at': datetime.utcnow().isoformat()}) + '\n')
+    counts = Counter()
+    for kind, model in CONTENT_MODELS.items():
+        for row in export_rows(model, batch_size):
+            output.write(json.dumps(dict(row, type=kind), ensure_ascii=False, default=datetime.isoformat) + '\n')
+            counts[kind] += 1
+    
+    click.echo(', '.join(f"{count} {kind}" for kind, count in counts.items()) + " dışa aktarıldı!", err=True)
+
+ImportedPost = namedtuple('ImportedPost', 'id title content')
+
+# Kimlikler eşleme tablosu tutulmadan kaydırılır: yeni kimlik = eski kimlik + hedefteki en büyük kimlik.
+# Kategori/ünite doğal anahtarıyla eşleştirilir. Hedefte aynı adla bulunan kullanıcı yalnızca
+# --merge-users ile mevcut hesaba bağlanır, aksi halde içe aktarılan hesap yeniden adlandırılır.
+# Her dışa aktarım exported_at damgasıyla kaydedilir; aynı dosya ikinci kez içe aktarılamaz.
+class ContentImporter:
+    def __init__(self, batch_size, merge_users=False):
+        self.batch_size = batch_size
+        self.merge_users = merge_users
+        self.offsets = {model: db.session.execute(db.select(db.func.max(model.id))).scalar() or 0
+                        for model in (User, Post, Comment)}
+        self.categories = {}
+        self.units = {}
+        self.merged_users = {}
+        self.renamed_users = {}
+        self.kind = None
+        self.rows = []
+        self.counts = Counter()
+    
+    def add(self, kind, record):
+        if kind == 'header':
+            if record.get('version') != CONTENT_EXPORT_VERSION:
+                raise click.ClickException(f"Desteklenmeyen dışa aktarım sürümü: {record.get('version')}")
+            exported_at = record.get('exported_at')
+            if exported_at:
+                if db.session.execute(db.select(ContentImport.id).where(ContentImport.exported_at == exported_at)).scalar():
+                    raise click.ClickException(f"Bu dışa aktarım ({exported_at}) zaten içe aktarılmış")
+                # İlk partiyle birlikte commit edilir; tekil kısıt eşzamanlı ikinci aktarımı da durdurur
+                db.session.add(ContentImport(exported_at=exported_at))
+            return
+        model = CONTENT_MODELS.get(kind)
+        if model is None:
+            raise click.ClickException(f"Bilinmeyen kayıt tipi: {kind}")
+        if kind != self.kind:
+            self.flush()
+            self.kind = kind
+        
+        row = {}
+        for column in model.__table__.columns:
+            if column.key in record:
+                value = record[column.key]
+                if value is not None and isinstance(column.type, db.DateTime):
+                    value = datetime.fromisoformat(value)
+                row[column.key] = value
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+    
+    def user_id(self, old_id):
+        if old_id is None:
+            return None
+        return self.merged_users.get(old_id, old_id + self.offsets[User])
+    
+    def shift(self, model, old_id):
+        return None if old_id is None else old_id + self.offsets[model]
+    
+    def retain_blobs(self, keys):
+        counts = Counter(key for key in keys if key and is_blob_key(key))
+        if counts:
+            change_blob_refs(counts, 1)
+    
+    def map_natural_keys(self, model, rows, key_columns, mapping):
+        def natural_key(item):
+            return tuple(item[column] if isinstance(item, dict) else getattr(item, column) for column in key_columns)
+        
+        def existing():
+            first = key_columns[0]
+            return {natural_key(item): item.id for item in model.query.filter(
+                getattr(model, first).in_({row[first] for row in rows})).all()}
+        
+        found = existing()
+        missing = [{column: value for column, value in row.items() if column != 'id'}
+                   for row in rows if natural_key(row) not in found]
+        if missing:
+            insert_ignoring_conflicts(model, missing)
+            found = existing()
+        for row in rows:
+            mapping[row['id']] = found.get(natural_key(row))
+    
+    def flush(self):
+        rows, self.rows = self.rows, []
+        if not rows:
+            return
+        
+        if self.kind == 'category':
+            self.map_natural_keys(Category, rows, ('name', 'class_level'), self.categories)
+            bump_taxonomy_version()
+        elif self.kind == 'unit':
+            for row in rows:
+                row['category_id'] = self.categories.get(row['category_id'])
+            self.map_natural_keys(Unit, [row for row in rows if row['category_id']], ('category_id', 'name'), self.units)
+            bump_taxonomy_version()
+        elif self.kind == 'blob':
+            # Referans sayıları kullanıcı/konu/yorum satırlarıyla birlikte artırılır
+            insert_ignoring_conflicts(Blob, [dict(row, ref_count=0) for row in rows])
+        elif self.kind == 'user':
+            existing = dict(db.session.execute(
+                db.select(User.username, User.id).where(User.username.in_([row['username'] for row in rows]))).all())
+            new_rows = []
+            for row in rows:
+                if row['username'] in existing and self.merge_users:
+                    self.merged_users[row['id']] = existing[row['username']]
+                    continue
+                new_id = self.shift(User, row['id'])
+                if row['username'] in existing:
+                    suffix = f"-{new_id}"
+                    username = f"{row['username'][:150 - len(suffix)]}{suffix}"
+                    self.renamed_users[row['username']] = username
+                    row['username'] = username
+                new_rows.append(dict(row, id=new_id))
+            if new_rows:
+                db.session.execute(db.insert(User), new_rows)
+            self.retain_blobs(row.get('profile_picture') for row in new_rows)
+        elif self.kind == 'post':
+            for row in rows:
+                row.update(id=self.shift(Post, row['id']), user_id=self.user_id(row.get('user_id')),
+                           category_id=self.categories.get(row.get('category_id')), unit_id=self.units.get(row.get('unit_id')))
+            db.session.execute(db.insert(Post), rows)
+            index_posts([ImportedPost(row['id'], row['title'], row['content']) for row in rows])
+            self.retain_blobs(row.get('image') for row in rows)
+        elif self.kind == 'comment':
+            for row in rows:
+                row.update(id=self.shift(Comment, row['id']), user_id=self.user_id(row.get('user_id')),
+                           post_id=self.shift(Post, row.get('post_id')))
+            db.session.execute(db.insert(Comment), rows)
+            self.retain_blobs(row.get('image') for row in rows)
+        elif self.kind == 'like':
+            insert_ignoring_conflicts(Like, [
+                dict({column: value for column, value in row.items() if column != 'id'},
+                     user_id=self.user_id(row.get('user_id')), post_id=self.shift(Post, row.get('post_id')),
+                     comment_id=self.shift(Comment, row.get('comment_id')))
+                for row in rows])
+        
+        db.session.commit()
+        self.counts[self.kind] += len(rows)
+    
+    def finish(self):
+        self.flush()
+        if db.engine.dialect.name == 'postgresql':
+            # Kimlikler elle verildiği için diziler en büyük kimliğe ilerletilir
+            for model in (User, Post, Comment):
+                table = quote_table(model.__table__.name)
+                db.session.execute(db.text(
+                    f"SELECT setval(pg_get_serial_sequence(:table, 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))"
+                ), {'table': table})
+            db.session.commit()
+        if self.merged_users:
+            recount_counters()
+
+@app.cli.command('import-content')
+@click.option('--input', 'source', type=click.File('r', encoding='utf-8'), default='-', help='Varsayılan: standart girdi')
+@click.option('--batch-size', type=int, default=1000)
+@click.option('--merge-users', is_flag=True, help='Aynı adlı mevcut kullanıcıyı içe aktarılanla aynı kişi say')
+def import_content_command(source, batch_size, merge_users):
+    importer = ContentImporter(batch_size, merge_users)
+    for line in source:
+        if line.strip():
+            record = json.loads(line)
+            importer.add(record.pop('type'), record)
+    importer.finish()
+    
+    print(', '.join(f"{count} {kind}" for kind, count in importer.counts.items()) + " içe aktarıldı!")
+    if importer.merged_users:
+        print(f"{len(importer.merged_users)} kullanıcı aynı adlı mevcut hesaplarla birleştirildi")
+    for old_name, new_name in importer.renamed_users.items():
+        print(f"Aynı adlı hesap bulunduğu için {old_name} -> {new_name} olarak aktarıldı")
+
 def create_database():
     with app.app_context():
         db.create_all()
+        run_migrations()
         init_categories()
         
         if not User.query.filter_by(username='Yönetici').first():
             admin_user = User(
                 username='Yönetici', 
-                password=generate_password_hash('admin123'),
+                password=generate_password_hash('admin123', app.config['PASSWORD_HASH_METHOD']),
                 class_level='Genel',
                 is_admin=True,
                 rank='FORUM KURUCUSU'
@@ -719,8 +3122,18 @@ def create_database():
         
         print("Veritabanı başarıyla oluşturuldu!")
 
-if __name__ == '__main__':
+@app.cli.command('init-db')
+def init_db_command():
+    create_database()
+
+# Üretim giriş noktası (wsgi.py). Veritabanı kurulumu burada yapılmaz; gunicorn ana süreci
+# işçileri başlatmadan önce bir kez `flask init-db` çalıştırır (bkz. gunicorn.conf.py)
+def create_app():
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    return app
+
+if __name__ == '__main__':
+    create_app()
     create_database()
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,335 @@
+# Performans ölçümü: sentetik veri üretir, rotaları test istemcisi ve eşzamanlı HTTP yüküyle çalıştırır,
+# istek başına p50/p99 gecikme, saniyedeki istek ve SQL ifadesi sayısını raporlar.
+#
+#   python benchmark.py                                   # geçici SQLite veritabanı
+#   python benchmark.py --database-url postgresql://localhost/beyinmatik_bench
+#   python benchmark.py --save-baseline bench_baseline.json
+#   python benchmark.py --baseline bench_baseline.json    # gerilemede 1 ile çıkar
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.cookiejar import CookieJar
+
+import click
+
+BENCH_PASSWORD = 'bench'
+
+# Fragman önbelleği kapalıyken ölçülen istek başına en fazla SQL ifadesi; N+1 gerilemelerini yakalar
+DEFAULT_STATEMENT_LIMITS = {
+    'forum': 4,
+    'forum_class': 4,
+    'forum_search': 5,
+    'post': 4,
+    'leaderboard': 4,
+    'profile': 5,
+    'like': 7,
+    'notifications': 4,
+}
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))]
+
+def summarize(latencies, statements=None, elapsed=None, errors=0):
+    result = {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+    if elapsed:
+        result['rps'] = round(len(latencies) / elapsed, 1)
+    if statements:
+        result['statements_mean'] = round(sum(statements) / len(statements), 2)
+        result['statements_max'] = max(statements)
+    return result
+
+def seed(A, users, posts, comments, likes, notifications, rng):
+    db = A.db
+    if A.User.query.filter_by(username='bench_0').first():
+        print("Mevcut bench verisi kullanılıyor")
+        return
+
+    started = time.perf_counter()
+    password = A.generate_password_hash(BENCH_PASSWORD, A.app.config['PASSWORD_HASH_METHOD'])
+    levels = ['5', '6', '7', '8']
+    units = [(unit.category_id, unit.id) for unit in A.Unit.query.all()]
+    now = datetime.utcnow()
+
+    def insert(model, rows):
+        for start in range(0, len(rows), 1000):
+            db.session.execute(db.insert(model), rows[start:start + 1000])
+
+    user_rows = []
+    for i in range(users):
+        solutions = int(rng.paretovariate(1.5)) - 1
+        user = A.User(is_admin=False, solution_count=solutions)
+        A.update_rank(user)
+        user_rows.append({'username': f'bench_{i}', 'password': password, 'class_level': rng.choice(levels),
+                          'solution_count': solutions, 'rank': user.rank, 'is_admin': False, 'is_banned': False})
+    insert(A.User, user_rows)
+    user_ids = db.session.execute(db.select(A.User.id).where(A.User.username.like('bench\\_%', escape='\\'))).scalars().all()
+
+    words = ['kesir', 'ondalık', 'oran', 'orantı', 'denklem', 'üçgen', 'alan', 'hacim', 'olasılık', 'üslü',
+             'köklü', 'çarpanlar', 'hücre', 'kuvvet', 'enerji', 'ışık', 'madde', 'İstanbul', 'paragraf', 'fiil']
+    post_rows = []
+    for i in range(posts):
+        category_id, unit_id = rng.choice(units)
+        post_rows.append({'title': f"{rng.choice(words)} {rng.choice(words)} sorusu {i}",
+                          'content': ' '.join(rng.choice(words) for _ in range(40)),
+                          'date_posted': now - timedelta(minutes=posts - i),
+                          'user_id': rng.choice(user_ids), 'category_id': category_id, 'unit_id': unit_id,
+                          'is_solved': False, 'is_pinned': i % 500 == 0})
+    insert(A.Post, post_rows)
+    post_ids = db.session.execute(db.select(A.Post.id)).scalars().all()
+
+    comment_rows = [{'content': ' '.join(rng.choice(words) for _ in range(15)),
+                     'date_posted': now - timedelta(seconds=comments - i),
+                     'user_id': rng.choice(user_ids), 'post_id': rng.choice(post_ids), 'is_solution': False}
+                    for i in range(comments)]
+    insert(A.Comment, comment_rows)
+    comment_ids = db.session.execute(db.select(A.Comment.id)).scalars().all()
+
+    # Kullanıcı başına aynı öğe iki kez beğenilemez
+    liked = set()
+    for _ in range(likes * 3):
+        if len(liked) >= likes:
+            break
+        if comment_ids and rng.random() < 0.3:
+            liked.add((rng.choice(user_ids), 'comment', rng.choice(comment_ids)))
+        else:
+            liked.add((rng.choice(user_ids), 'post', rng.choice(post_ids)))
+    insert(A.Like, [{'user_id': user_id, 'post_id': item_id if item_type == 'post' else None,
+                     'comment_id': item_id if item_type == 'comment' else None}
+                    for user_id, item_type, item_id in liked])
+
+    insert(A.Notification, [{'user_id': rng.choice(user_ids), 'message': 'Konunuza yeni bir yorum yapıldı',
+                             'link': f'/post/{rng.choice(post_ids)}', 'seen': rng.random() < 0.7}
+                            for _ in range(notifications)])
+    db.session.commit()
+
+    A.recount_counters()
+    for start in range(0, len(post_ids), 1000):
+        A.index_posts(A.Post.query.filter(A.Post.id.in_(post_ids[start:start + 1000])).all())
+    db.session.commit()
+    print(f"Veri üretildi: {users} kullanıcı, {posts} konu, {comments} yorum, {len(liked)} beğeni, "
+          f"{notifications} bildirim ({time.perf_counter() - started:.1f} sn)")
+
+def scenarios(A, rng):
+    post_ids = A.db.session.execute(A.db.select(A.Post.id)).scalars().all()
+    user_count = A.User.query.filter(A.User.username.like('bench\\_%', escape='\\')).count()
+    levels = ['5', '6', '7', '8']
+    terms = ['kesir', 'denklem', 'istanbul', 'hücre', 'olasılık']
+    return {
+        'forum': lambda: '/forum?class_level=Hepsi',
+        'forum_class': lambda: f'/forum?class_level={rng.choice(levels)}',
+        'forum_search': lambda: '/forum?class_level=Hepsi&q=' + urllib.parse.quote(rng.choice(terms)),
+        'post': lambda: f'/post/{rng.choice(post_ids)}',
+        'leaderboard': lambda: f'/leaderboard?class_level={rng.choice(levels + ["Hepsi"])}',
+        'profile': lambda: f'/profile/bench_{rng.randrange(user_count)}',
+        'like': lambda: f'/like/post/{rng.choice(post_ids)}',
+        'notifications': lambda: '/notifications',
+    }, user_count
+
+def run_test_client(A, routes, user_count, iterations, counter, rng):
+    # Önbellek kapalı: her istek gerçekten render edilir ve sorguları sayılır
+    cache_ttl, cache_shared = A.fragment_cache.ttl, A.fragment_cache.shared
+    A.fragment_cache.ttl, A.fragment_cache.shared = 0, None
+    try:
+        with A.app.app_context():
+            bench_user_ids = A.db.session.execute(
+                A.db.select(A.User.id).where(A.User.username.like('bench\\_%', escape='\\'))).scalars().all()
+        results = {}
+        for name, build_url in routes.items():
+            client = A.app.test_client()
+            with client.session_transaction() as session:
+                session['_user_id'] = str(rng.choice(bench_user_ids))
+            client.get(build_url())
+            latencies, statements, errors = [], [], 0
+            for _ in range(iterations):
+                url = build_url()
+                counter.value = 0
+                started = time.perf_counter()
+                response = client.get(url)
+                latencies.append(time.perf_counter() - started)
+                statements.append(counter.value)
+                if response.status_code >= 400:
+                    errors += 1
+            results[name] = summarize(latencies, statements, errors=errors)
+        return results
+    finally:
+        A.fragment_cache.ttl, A.fragment_cache.shared = cache_ttl, cache_shared
+
+def run_http_load(base_url, routes, user_count, concurrency, duration, rng):
+    weights = {'forum': 30, 'forum_class': 15, 'forum_search': 5, 'post': 30, 'leaderboard': 5,
+               'profile': 5, 'like': 5, 'notifications': 5}
+    names = list(routes)
+    latencies, errors, lock = defaultdict(list), defaultdict(int), threading.Lock()
+
+    # Girişler (şifre doğrulaması) ölçüme katılmaz; her istemci kendi çerezleriyle önceden oturum açar
+    def login(index):
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+        form = urllib.parse.urlencode({'username': f'bench_{index % user_count}', 'password': BENCH_PASSWORD}).encode()
+        # Şifre özeti kuyruğu doluysa sunucu girişi reddedip giriş sayfasına döner; kısa bir süre sonra yeniden denenir
+        for _ in range(50):
+            response = opener.open(base_url + '/login', form)
+            response.read()
+            if not response.geturl().endswith('/login'):
+                return opener
+            time.sleep(0.2)
+        raise click.ClickException(f'bench_{index % user_count} giriş yapamadı')
+
+    def worker(opener):
+        local_rng = random.Random(rng.random())
+        while time.perf_counter() < deadline:
+            name = local_rng.choices(names, [weights.get(n, 1) for n in names])[0]
+            started = time.perf_counter()
+            try:
+                opener.open(base_url + routes[name]()).read()
+                failed = False
+            except OSError:
+                failed = True
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies[name].append(elapsed)
+                errors[name] += failed
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        openers = list(executor.map(login, range(concurrency)))
+        started = time.perf_counter()
+        deadline = started + duration
+        list(executor.map(worker, openers))
+    elapsed = time.perf_counter() - started
+
+    results = {name: summarize(values, elapsed=elapsed, errors=errors[name]) for name, values in latencies.items()}
+    total = [value for values in latencies.values() for value in values]
+    results['total'] = summarize(total, elapsed=elapsed, errors=sum(errors.values()))
+    return results
+
+def print_table(title, results):
+    print(f"\n{title}")
+    print(f"{'rota':<16}{'istek':>8}{'hata':>6}{'p50 ms':>10}{'p99 ms':>10}{'istek/sn':>10}{'SQL ort':>9}{'SQL max':>9}")
+    for name, r in results.items():
+        print(f"{name:<16}{r['requests']:>8}{r['errors']:>6}{r['p50_ms']:>10}{r['p99_ms']:>10}"
+              f"{r.get('rps', ''):>10}{r.get('statements_mean', ''):>9}{r.get('statements_max', ''):>9}")
+
+def check_regressions(report, baseline, tolerance, max_p99_ms):
+    failures = []
+    for name, r in report['test_client'].items():
+        limit = DEFAULT_STATEMENT_LIMITS.get(name)
+        if limit is not None and r['statements_max'] > limit:
+            failures.append(f"{name}: {r['statements_max']} SQL ifadesi (sınır {limit})")
+        if r['errors']:
+            failures.append(f"{name}: {r['errors']} hatalı yanıt")
+        if max_p99_ms and r['p99_ms'] > max_p99_ms:
+            failures.append(f"{name}: p99 {r['p99_ms']} ms (sınır {max_p99_ms} ms)")
+
+    for phase in ('test_client', 'http'):
+        for name, old in (baseline or {}).get(phase, {}).items():
+            new = report.get(phase, {}).get(name)
+            if not new:
+                continue
+            # p99 az örnekte gürültülüdür; taban karşılaştırması medyan üzerinden yapılır
+            if new['p50_ms'] > old['p50_ms'] * (1 + tolerance):
+                failures.append(f"{phase}/{name}: p50 {old['p50_ms']} -> {new['p50_ms']} ms")
+            if 'statements_max' in old and new.get('statements_max', 0) > old['statements_max']:
+                failures.append(f"{phase}/{name}: SQL {old['statements_max']} -> {new['statements_max']}")
+            if 'rps' in old and new.get('rps', 0) < old['rps'] * (1 - tolerance):
+                failures.append(f"{phase}/{name}: istek/sn {old['rps']} -> {new['rps']}")
+    return failures
+
+@click.command()
+@click.option('--database-url', default=None, help='Varsayılan: geçici bir SQLite dosyası')
+@click.option('--users', type=int, default=500)
+@click.option('--posts', type=int, default=5000)
+@click.option('--comments', type=int, default=20000)
+@click.option('--likes', type=int, default=30000)
+@click.option('--notifications', type=int, default=5000)
+@click.option('--iterations', type=int, default=50, help='Test istemcisiyle rota başına istek sayısı')
+@click.option('--concurrency', type=int, default=8, help='HTTP yükünde eşzamanlı istemci sayısı')
+@click.option('--duration', type=float, default=10.0, help='HTTP yükünün süresi (sn); 0 ise atlanır')
+@click.option('--url', default=None, help='Çalışan bir sunucuya yük ver (örn. gunicorn); verilmezse süreç içinde başlatılır')
+@click.option('--seed', 'seed_value', type=int, default=42)
+@click.option('--output', type=click.Path(dir_okay=False), default=None, help='Raporu JSON olarak kaydet')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), default=None, help='Bu rapora göre gerilemeleri denetle')
+@click.option('--save-baseline', type=click.Path(dir_okay=False), default=None)
+@click.option('--tolerance', type=float, default=0.25, help='Gecikme ve istek/sn için izin verilen sapma oranı')
+@click.option('--max-p99-ms', type=float, default=None, help='Test istemcisi rotaları için mutlak p99 sınırı')
+def main(database_url, users, posts, comments, likes, notifications, iterations, concurrency, duration, url,
+         seed_value, output, baseline, save_baseline, tolerance, max_p99_ms):
+    workdir = tempfile.mkdtemp(prefix='beyinmatik-bench-')
+    os.environ['DATABASE_URL'] = database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    # Hız sınırı rotaların maliyetini değil istemci sayısını ölçer; yük altında kapatılır
+    os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+
+    import app as A
+    from sqlalchemy import event
+
+    A.app.config['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+    os.makedirs(A.app.config['UPLOAD_FOLDER'], exist_ok=True)
+    A.create_database()
+
+    rng = random.Random(seed_value)
+    with A.app.app_context():
+        seed(A, users, posts, comments, likes, notifications, rng)
+        routes, user_count = scenarios(A, rng)
+
+        counter = threading.local()
+        @event.listens_for(A.db.engine, 'before_cursor_execute')
+        def count_statement(*args):
+            counter.value = getattr(counter, 'value', 0) + 1
+
+    report = {'database': A.app.config['SQLALCHEMY_DATABASE_URI'].split('://')[0], 'created_at': datetime.utcnow().isoformat(),
+              'dataset': {'users': users, 'posts': posts, 'comments': comments, 'likes': likes, 'notifications': notifications}}
+    report['test_client'] = run_test_client(A, routes, user_count, iterations, counter, rng)
+    print_table("Test istemcisi (fragman önbelleği kapalı)", report['test_client'])
+
+    if duration > 0:
+        server = None
+        if url is None:
+            from werkzeug.serving import make_server
+            logging.getLogger('werkzeug').setLevel(logging.ERROR)
+            server = make_server('127.0.0.1', 0, A.app, threaded=True)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = f'http://127.0.0.1:{server.server_port}'
+        try:
+            report['http'] = run_http_load(url.rstrip('/'), routes, user_count, concurrency, duration, rng)
+        finally:
+            if server is not None:
+                server.shutdown()
+        print_table(f"HTTP yükü ({concurrency} eşzamanlı istemci, {duration:g} sn)", report['http'])
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if save_baseline:
+        with open(save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    reference = None
+    if baseline:
+        with open(baseline, encoding='utf-8') as f:
+            reference = json.load(f)
+    failures = check_regressions(report, reference, tolerance, max_p99_ms)
+    if failures:
+        print("\nGerileme bulundu:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nTüm eşikler geçildi")
+
+if __name__ == '__main__':
+    main()
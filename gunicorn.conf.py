@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+# gunicorn -c gunicorn.conf.py wsgi:application
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# gthread: her işçi WEB_THREADS isteği aynı anda işler; uzun süren her istek yine bir iş parçacığını
+# tamamen tutar. /notifications/stream bu yüzden burada değil, gunicorn.stream.conf.py ile başlatılan
+# ayrı gevent sunucusunda sunulur; nginx.conf bu konumu oraya yönlendirir ve NOTIFICATION_STREAM_URL
+# verilince sayfalar akışı bekler. Akış sunucusu yoksa sayfalar koşullu /notifications sorgusunu kullanır.
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# Veritabanı havuzu (DB_POOL_SIZE) varsayılan olarak bu değere eşittir; ikisi birlikte büyütülmelidir
+threads = int(os.environ.get('WEB_THREADS', 8))
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('WEB_KEEPALIVE', 5))
+
+# Bellek sızıntılarına karşı işçiler belirli istek sayısından sonra yenilenir
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 200))
+
+accesslog = '-'
+errorlog = '-'
+
+# Üretimde uygulama bir ters vekilin (PaaS yönlendiricisi/nginx) arkasındadır: istemci IP'si
+# X-Forwarded-For'dan alınır, yoksa hız sınırı tüm istemcileri vekilin tek IP'sinde toplar.
+# gunicorn doğrudan internete açıksa PROXY_FIX_X_FOR=0 verilmelidir.
+os.environ.setdefault('PROXY_FIX_X_FOR', '1')
+
+# Uygulama ana süreçte yüklenmez; her işçi kendi veritabanı havuzunu ve arka plan iş parçacıklarını açar
+preload_app = False
+
+def on_starting(server):
+    # Tablolar, göçler ve başlangıç verisi işçiler başlamadan yalnızca bir kez hazırlanır.
+    # Sürüm adımında ayrıca `flask init-db` çalıştırılıyorsa INIT_DB=0 ile kapatılabilir.
+    if os.environ.get('INIT_DB', '1') == '1':
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init-db'], check=True)
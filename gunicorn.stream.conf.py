@@ -0,0 +1,33 @@
+import os
+
+# Bildirim akışı için ayrı asenkron sunucu: gunicorn -c gunicorn.stream.conf.py wsgi:application
+# nginx.conf /notifications/stream konumunu buraya, geri kalan her şeyi gunicorn.conf.py sunucusuna
+# yönlendirir; uygulama her iki süreçte de NOTIFICATION_STREAM_URL=/notifications/stream ile çalışır.
+# Bekleyen her istek bir iş parçacığı değil bir greenlet tutar, veritabanı bağlantısı tutmaz.
+# Bildirimler web işçilerinde yazılıp burada beklendiği için NOTIFICATION_BACKEND=postgresql
+# (LISTEN/NOTIFY) gerekir; yerel yayın yalnızca aynı süreçteki abonelere ulaşır.
+bind = f"0.0.0.0:{os.environ.get('STREAM_PORT', 5001)}"
+
+worker_class = 'gevent'
+workers = int(os.environ.get('STREAM_WORKERS', 1))
+worker_connections = int(os.environ.get('STREAM_WORKER_CONNECTIONS', 1000))
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('WEB_KEEPALIVE', 5))
+
+accesslog = '-'
+errorlog = '-'
+
+os.environ.setdefault('PROXY_FIX_X_FOR', '1')
+
+# Tablolar ve göçler gunicorn.conf.py sunucusunun on_starting adımında hazırlanır
+preload_app = False
+
+def post_fork(server, worker):
+    # psycopg2 soketleri gevent'e devredilmezse her sorgu süreçteki tüm bekleyen akışları durdurur
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        server.log.warning('psycogreen kurulu değil, veritabanı sorguları gevent döngüsünü bekletir')
+        return
+    patch_psycopg()
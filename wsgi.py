@@ -0,0 +1,4 @@
+# Üretimde: gunicorn -c gunicorn.conf.py wsgi:application
+from app import create_app
+
+application = create_app()